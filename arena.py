@@ -0,0 +1,352 @@
+import heapq
+import random
+import pygame
+from array import array
+from collections import deque
+from camera import Camera
+from cells import FreeCellIndex
+from snake import INPUT_QUEUE_SIZE
+from utils import *
+
+# Default board for arena games; big enough for a hundred bots
+ARENA_GRID_SIZE = 120
+
+# Food items kept on the board at all times
+ARENA_FOOD_COUNT = 200
+
+# Rule constants shared with the single player game
+SPECIAL_FOOD_SCORE = 5
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+# Keys of up to two local players; the first one is followed by the camera
+PLAYER_KEYS = [
+    {pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1), pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)},
+    {pygame.K_w: (0, -1), pygame.K_s: (0, 1), pygame.K_a: (-1, 0), pygame.K_d: (1, 0)},
+]
+PLAYER_COLORS = [(YELLOW, (255, 170, 0)), ((0, 200, 255), BLUE)]
+BOT_COLORS = (WHITE, GREEN)
+
+
+class ArenaSnake:
+    """One snake in an arena.
+
+    The body is a deque of cell indices (y * grid_size + x), head first. The
+    snake does not track its own cells; the arena's shared grid does.
+    """
+
+    def __init__(self, number, controller=None, colors=BOT_COLORS):
+        self.number = number  # Value written to the arena grid for our cells
+        # Bot policy called as controller(arena, snake) -> direction or None;
+        # None for snakes steered by a local player
+        self.controller = controller
+        self.head_color, self.body_color = colors
+        self.body = deque()
+        self.direction = (0, -1)
+        self.input_queue = deque()
+        self.grow_pending = 0
+        self.score = 0
+        self.alive = False
+        self.next_head = None
+
+    def queue_direction(self, dir):
+        """Buffer a turn like Snake.queue_direction; returns False when rejected"""
+        last = self.input_queue[-1] if self.input_queue else self.direction
+        if dir == last or (dir[0] == -last[0] and dir[1] == -last[1]):
+            return False
+        if len(self.input_queue) >= INPUT_QUEUE_SIZE:
+            return False
+        self.input_queue.append(dir)
+        return True
+
+    def set_direction(self, dir):
+        # Prevent reversing
+        if dir[0] == -self.direction[0] and dir[1] == -self.direction[1]:
+            return
+        self.direction = dir
+
+
+class Arena:
+    """Many snakes and many food items on one wrapping board.
+
+    Every snake cell is recorded in one shared grid holding the owning
+    snake's number (0 for an empty cell), and cells free of snakes and food
+    are kept in a FreeCellIndex. A tick moves each snake once and resolves
+    head-to-body, head-to-head and food collisions with grid and dict lookups
+    at the new heads, so its cost grows with the number of snakes and not
+    with their total length.
+
+    Moves are simultaneous: tails leave first, so a head may enter a cell a
+    tail left in the same tick. Two heads entering the same cell both die.
+    Eaten food is replaced at once; a replacement is special with
+    `special_food_chance` and turns back into normal food after
+    `special_food_duration` ticks.
+    """
+
+    def __init__(self, grid_size=ARENA_GRID_SIZE, num_food=ARENA_FOOD_COUNT,
+                 special_food_chance=SPECIAL_FOOD_SPAWN_CHANCE,
+                 special_food_duration=SPECIAL_FOOD_DURATION,
+                 respawn_bots=True, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.grid_size = grid_size
+        self.num_cells = grid_size * grid_size
+        self.special_food_chance = special_food_chance
+        self.special_food_duration = special_food_duration
+        self.respawn_bots = respawn_bots
+
+        # Owning snake number per cell, 0 when no snake is on it
+        self.grid = array('I', [0]) * self.num_cells
+        # Cells with neither a snake nor food
+        self.free_cells = FreeCellIndex(self.num_cells)
+        # Food cell -> tick its special status ends, or 0 for normal food
+        self.food = {}
+        self.special_expiry = []  # Heap of (tick, cell)
+
+        self.snakes = []
+        self.ticks = 0
+
+        for _ in range(num_food):
+            self.spawn_food()
+
+    def position(self, cell):
+        return (cell % self.grid_size, cell // self.grid_size)
+
+    def cell_index(self, position):
+        return position[1] * self.grid_size + position[0]
+
+    def next_cell(self, cell, direction):
+        """Cell one step from cell in direction, wrapping at the edges"""
+        g = self.grid_size
+        return ((cell // g + direction[1]) % g) * g + (cell % g + direction[0]) % g
+
+    def add_snake(self, controller=None, colors=BOT_COLORS):
+        """Add a snake at a random free cell; returns it, dead if the board is full"""
+        snake = ArenaSnake(len(self.snakes) + 1, controller, colors)
+        self.snakes.append(snake)
+        self.respawn(snake)
+        return snake
+
+    def respawn(self, snake):
+        """Bring a dead snake back as a one-cell snake at a random free cell"""
+        cell = self.free_cells.choice(self.rng)
+        if cell is None:
+            return False
+        self.free_cells.occupy(cell)
+        self.grid[cell] = snake.number
+        snake.body = deque([cell])
+        snake.direction = self.rng.choice(DIRECTIONS)
+        snake.input_queue.clear()
+        snake.grow_pending = 0
+        snake.score = 0
+        snake.alive = True
+        return True
+
+    def kill(self, snake):
+        """Remove a snake's remaining cells from the board"""
+        snake.alive = False
+        for cell in snake.body:
+            self.grid[cell] = 0
+            self.free_cells.release(cell)
+        snake.body.clear()
+
+    def spawn_food(self, special=False):
+        """Put a food item on a random free cell; returns False when there is none"""
+        cell = self.free_cells.choice(self.rng)
+        if cell is None:
+            return False
+        self.free_cells.occupy(cell)
+        if special:
+            expiry = self.ticks + self.special_food_duration
+            self.food[cell] = expiry
+            heapq.heappush(self.special_expiry, (expiry, cell))
+        else:
+            self.food[cell] = 0
+        return True
+
+    def expire_special_food(self):
+        while self.special_expiry and self.special_expiry[0][0] <= self.ticks:
+            expiry, cell = heapq.heappop(self.special_expiry)
+            # The item may have been eaten and replaced in the meantime
+            if self.food.get(cell) == expiry:
+                self.food[cell] = 0
+
+    def step(self):
+        """Move every living snake once; returns the snakes that died this tick"""
+        self.ticks += 1
+        self.expire_special_food()
+
+        if self.respawn_bots:
+            for snake in self.snakes:
+                if not snake.alive and snake.controller is not None:
+                    self.respawn(snake)
+
+        moving = [snake for snake in self.snakes if snake.alive]
+
+        # Turn, pick the new head and let the tail go
+        targets = {}
+        for snake in moving:
+            if snake.input_queue:
+                snake.set_direction(snake.input_queue.popleft())
+            elif snake.controller is not None:
+                direction = snake.controller(self, snake)
+                if direction is not None:
+                    snake.set_direction(direction)
+
+            head = self.next_cell(snake.body[0], snake.direction)
+            snake.next_head = head
+            targets[head] = targets.get(head, 0) + 1
+
+            if snake.grow_pending > 0:
+                snake.grow_pending -= 1
+            else:
+                tail = snake.body.pop()
+                self.grid[tail] = 0
+                self.free_cells.release(tail)
+
+        # Collisions are judged on the board as it is after all tails moved
+        died = [snake for snake in moving
+                if targets[snake.next_head] > 1 or self.grid[snake.next_head]]
+        for snake in died:
+            self.kill(snake)
+
+        for snake in moving:
+            if not snake.alive:
+                continue
+            head = snake.next_head
+            snake.body.appendleft(head)
+            self.grid[head] = snake.number
+
+            expiry = self.food.pop(head, None)
+            if expiry is None:
+                self.free_cells.occupy(head)
+                continue
+
+            # The food cell was already taken out of the free set
+            if expiry:
+                snake.grow_pending += SPECIAL_FOOD_GROWTH_BONUS
+                snake.score += SPECIAL_FOOD_SCORE
+            else:
+                snake.grow_pending += 1
+                snake.score += 1
+            self.spawn_food(self.rng.random() < self.special_food_chance)
+
+        return died
+
+    def alive_count(self):
+        return sum(snake.alive for snake in self.snakes)
+
+
+def wander_bot(arena, snake):
+    """Cheap bot: go for adjacent food, avoid occupied cells, otherwise turn now and then"""
+    head = snake.body[0]
+    straight = snake.direction
+    options = [straight] + [d for d in DIRECTIONS
+                            if d != straight and d != (-straight[0], -straight[1])]
+    safe = []
+    for direction in options:
+        cell = arena.next_cell(head, direction)
+        if cell in arena.food:
+            return direction
+        if not arena.grid[cell]:
+            safe.append(direction)
+    if not safe:
+        return None
+    if safe[0] == straight and arena.rng.random() >= 0.1:
+        return straight
+    return arena.rng.choice(safe)
+
+
+class ArenaGame:
+    """Window loop for an arena with local players and bots.
+
+    Player one steers with the arrow keys and player two with WASD. A dead
+    player comes back with SPACE; ESC or closing the window quits. The
+    camera follows player one, and drawing only looks at the cells in view.
+    """
+
+    def __init__(self, surface, num_bots, num_players=1, grid_size=ARENA_GRID_SIZE,
+                 speed=FPS, seed=None, display=None):
+        self.surface = surface
+        self.display = display
+        self.arena = Arena(grid_size, seed=seed)
+        self.players = [self.arena.add_snake(colors=PLAYER_COLORS[i]) for i in range(num_players)]
+        for _ in range(num_bots):
+            self.arena.add_snake(wander_bot)
+        self.speed = speed
+        self.camera = Camera(grid_size)
+        self.clock = pygame.time.Clock()
+        self.font = get_font(24)
+        self.status_bar_rect = pygame.Rect(0, WINDOW_SIZE, WINDOW_SIZE, 40)
+        self.background = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+        self.background.fill(BLACK)
+        draw_grid(self.background)
+        self.accumulator = 0.0
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.VIDEORESIZE and self.display:
+                self.display.layout()
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_ESCAPE:
+                return False
+            if event.key == pygame.K_SPACE:
+                for player in self.players:
+                    if not player.alive:
+                        self.arena.respawn(player)
+            for player, keys in zip(self.players, PLAYER_KEYS):
+                if event.key in keys and player.alive:
+                    player.queue_direction(keys[event.key])
+        return True
+
+    def render(self):
+        arena, camera = self.arena, self.camera
+        if self.players[0].alive:
+            camera.follow(arena.position(self.players[0].body[0]))
+        self.surface.blit(self.background, (0, 0))
+
+        heads = {snake.body[0] for snake in arena.snakes if snake.alive}
+        for y in range(camera.view):
+            for x in range(camera.view):
+                cell = arena.cell_index(camera.to_board((x, y)))
+                number = arena.grid[cell]
+                rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+                if number:
+                    snake = arena.snakes[number - 1]
+                    pygame.draw.rect(self.surface, snake.head_color if cell in heads else snake.body_color, rect)
+                    pygame.draw.rect(self.surface, BLACK, rect, 1)
+                elif cell in arena.food:
+                    pygame.draw.rect(self.surface, GOLD if arena.food[cell] else RED, rect.inflate(-4, -4))
+
+        self.render_status_bar()
+        if self.display:
+            self.display.present()
+        else:
+            pygame.display.flip()
+
+    def render_status_bar(self):
+        pygame.draw.rect(self.surface, BLUE, self.status_bar_rect)
+        scores = ' | '.join(f"P{i + 1}: {player.score}" if player.alive else f"P{i + 1}: SPACE"
+                            for i, player in enumerate(self.players))
+        text = render_text(self.font, f"{scores} | Snakes: {self.arena.alive_count()}/{len(self.arena.snakes)}", WHITE)
+        self.surface.blit(text, (10, WINDOW_SIZE + 10))
+
+    def run(self):
+        tick_length = 1.0 / self.speed
+        while True:
+            self.accumulator += self.clock.tick(RENDER_FPS) / 1000.0
+            if not self.handle_events():
+                break
+            ticks = 0
+            while self.accumulator >= tick_length and ticks < MAX_TICKS_PER_FRAME:
+                self.accumulator -= tick_length
+                self.arena.step()
+                ticks += 1
+            if ticks == MAX_TICKS_PER_FRAME:
+                self.accumulator = 0.0
+            self.render()
@@ -0,0 +1,215 @@
+import time
+from heapq import heappush, heappop
+from itertools import islice
+
+# Seconds of planning allowed per tick before falling back to a safe move
+AUTOPILOT_BUDGET = 0.002
+
+# Cells expanded between clock checks
+CLOCK_CHECK_INTERVAL = 64
+
+# Same order as the batch engine and replay direction codes
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+UNREACHED = 0x7FFFFFFF
+
+
+def neighbor_cells(cell, grid_size):
+    """Cell index of the neighbour in each direction, wrapping like Snake.move"""
+    g = grid_size
+    x = cell % g
+    up = cell - g if cell >= g else cell + g * g - g
+    down = cell + g if cell < g * g - g else cell - g * g + g
+    left = cell - 1 if x else cell + g - 1
+    right = cell + 1 if x != g - 1 else cell - g + 1
+    return (up, down, left, right)
+
+
+def wrapped_distance(cell, target, grid_size):
+    g = grid_size
+    dx = abs(cell % g - target % g)
+    dy = abs(cell // g - target // g)
+    return min(dx, g - dx) + min(dy, g - dy)
+
+
+class DistanceField:
+    """Distances from reachable cells to one target cell.
+
+    Built by a search out from the target that can stop at any point and
+    resume on a later tick. Cells are expanded in order of their distance
+    plus the wrapped distance to the head, as in A*, so the search heads
+    straight for the snake and stops once nothing left in the queue could
+    give the head a shorter path; on an open board that is little more than
+    the cells along the way, however large the board. Every stored distance
+    is the length of a real path to the target. Only reached cells are
+    stored, so a new target costs nothing up front.
+
+    Between builds the field is kept up to date from the snake's change log:
+    a freed tail cell is relaxed into the field and can shorten distances
+    around it. A cell covered by the head is not removed; instead `floor`
+    remembers the smallest distance covered since the build. Paths only
+    pass through cells with smaller distances, so every distance below
+    `floor` still leads to the target.
+    """
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.distance = {}
+        self.target = None
+        self.head = None
+        self.heap = []  # (distance + distance to the head, -distance, cell)
+        self.floor = UNREACHED
+
+    def get(self, cell):
+        return self.distance.get(cell, UNREACHED)
+
+    def reset(self, target):
+        self.target = target
+        self.distance.clear()
+        self.heap.clear()
+        self.floor = UNREACHED
+        if target is not None:
+            self.push(target, 0)
+
+    def push(self, cell, distance):
+        self.distance[cell] = distance
+        estimate = 0 if self.head is None else wrapped_distance(cell, self.head, self.grid_size)
+        heappush(self.heap, (distance + estimate, -distance, cell))
+
+    @property
+    def complete(self):
+        return not self.heap
+
+    def cell_freed(self, cell):
+        """Give a newly free cell a distance from its neighbours and spread it"""
+        best = min(self.get(neighbor) for neighbor in neighbor_cells(cell, self.grid_size))
+        if best < UNREACHED and best + 1 < self.get(cell):
+            self.push(cell, best + 1)
+
+    def cell_blocked(self, cell):
+        self.floor = min(self.floor, self.get(cell))
+
+    def expand(self, blocked, head, deadline):
+        """Grow the field until the head's distance is settled or the deadline passes.
+
+        Returns True when the field is complete.
+        """
+        self.head = head
+        heap, distance, g = self.heap, self.distance, self.grid_size
+        hx, hy = head % g, head // g
+        around = [cell for cell in neighbor_cells(head, g) if not blocked[cell]]
+        # Length of the best path from the head found so far
+        reached = min((distance.get(cell, UNREACHED) for cell in around), default=UNREACHED) + 1
+        count = 0
+        while heap:
+            if heap[0][0] >= reached:
+                return False  # Nothing left can give the head a shorter path
+            count += 1
+            if count % CLOCK_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                return False
+            _, negative, cell = heappop(heap)
+            if distance[cell] != -negative:
+                continue  # Superseded by a shorter distance pushed later
+            if blocked[cell] and cell != self.target:
+                continue
+            step = 1 - negative
+            for neighbor in neighbor_cells(cell, g):
+                if blocked[neighbor] or distance.get(neighbor, UNREACHED) <= step:
+                    continue
+                distance[neighbor] = step
+                if neighbor in around:
+                    reached = min(reached, step + 1)
+                dx = abs(neighbor % g - hx)
+                dy = abs(neighbor // g - hy)
+                heappush(heap, (step + min(dx, g - dx) + min(dy, g - dy), -step, neighbor))
+        return True
+
+
+class Autopilot:
+    """Steers the snake to the food for demos and soak tests.
+
+    Each tick it brings a wrap-aware distance field to the food up to date
+    within `budget` seconds and steps to the neighbouring cell closest to
+    the food. When the field does not reach the head yet, or the food cannot
+    be reached, it makes a safe move towards the food instead, so planning
+    never stalls a frame; the search carries on next tick.
+    """
+
+    def __init__(self, grid_size, budget=AUTOPILOT_BUDGET):
+        self.grid_size = grid_size
+        self.budget = budget
+        self.field = DistanceField(grid_size)
+        self.snake = None
+        self.moves = 0
+        self.pops = 0
+        self.fallbacks = 0  # Ticks where the field could not be used
+
+    def choose(self, snake, food):
+        """Direction for the snake's next move"""
+        deadline = time.perf_counter() + self.budget
+        target = None if food.position is None else snake.cell_index(food.position)
+        self.sync(snake, target)
+
+        field = self.field
+        head = snake.cell_index(snake.get_head())
+        field.expand(snake.occupancy, head, deadline)
+
+        best = None
+        best_distance = UNREACHED
+        for direction, cell in zip(DIRECTIONS, neighbor_cells(head, self.grid_size)):
+            if self.is_reverse(snake, direction):
+                continue
+            distance = field.get(cell)
+            if distance < best_distance and not snake.occupancy[cell]:
+                best, best_distance = direction, distance
+
+        if best is not None and best_distance < field.floor:
+            return best
+        if best_distance < UNREACHED:
+            # Distances past the floor may route through the body; search again
+            field.reset(target)
+        self.fallbacks += 1
+        return self.safe_move(snake, head, target)
+
+    def sync(self, snake, target):
+        """Apply the snake's moves since the last call to the field"""
+        field = self.field
+        new_moves = snake.moves - self.moves
+        new_pops = snake.pops - self.pops
+        if (snake is not self.snake or target != field.target
+                or new_pops > len(snake.vacated)):
+            field.reset(target)
+        else:
+            for position in islice(reversed(snake.vacated), new_pops):
+                cell = snake.cell_index(position)
+                if not snake.occupancy[cell]:
+                    field.cell_freed(cell)
+            for position in islice(snake.body, new_moves):
+                field.cell_blocked(snake.cell_index(position))
+        self.snake = snake
+        self.moves = snake.moves
+        self.pops = snake.pops
+
+    def safe_move(self, snake, head, target):
+        """Move to a free cell, closest to the food by wrapped distance, then with the most room"""
+        occupancy = snake.occupancy
+        best = snake.direction
+        best_key = None
+        for direction, cell in zip(DIRECTIONS, neighbor_cells(head, self.grid_size)):
+            if self.is_reverse(snake, direction):
+                continue
+            if occupancy[cell]:
+                continue
+            room = sum(not occupancy[neighbor] for neighbor in neighbor_cells(cell, self.grid_size))
+            # Never step into a dead end while another way is open
+            key = (room > 0, -self.wrapped_distance(cell, target), room, direction == snake.direction)
+            if best_key is None or key > best_key:
+                best, best_key = direction, key
+        return best
+
+    def wrapped_distance(self, cell, target):
+        return 0 if target is None else wrapped_distance(cell, target, self.grid_size)
+
+    @staticmethod
+    def is_reverse(snake, direction):
+        return direction[0] == -snake.direction[0] and direction[1] == -snake.direction[1]
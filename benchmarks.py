@@ -0,0 +1,174 @@
+"""Microbenchmarks for the simulation and rendering hot paths.
+
+Run from the repository root:
+
+    python benchmarks.py --save bench.json                 # record a baseline
+    python benchmarks.py --baseline bench.json             # compare, exit 1 on regressions
+
+Rendering runs under the SDL dummy video driver, so no display is needed.
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import pygame
+from snake import Snake
+from food import Food
+from utils import WINDOW_SIZE, GRID_SIZE
+
+# Snake lengths to measure: a fresh snake up to an almost full board
+SNAKE_LENGTHS = [1, GRID_SIZE * GRID_SIZE // 10, GRID_SIZE * GRID_SIZE // 2, GRID_SIZE * GRID_SIZE - 10]
+DEFAULT_TOLERANCE = 0.25
+REPEATS = 5
+
+
+def cycle_direction(position):
+    """Direction along a Hamiltonian cycle of the wrapped board (rows in boustrophedon order)"""
+    x, y = position
+    if y % 2 == 0:
+        return (0, 1) if x == GRID_SIZE - 1 else (1, 0)
+    return (0, 1) if x == 0 else (-1, 0)
+
+
+def make_snake(length):
+    """Snake of the given length lying on the cycle, so it can keep moving without dying"""
+    snake = Snake()
+    for _ in range(length - 1):
+        snake.grow()
+        snake.set_direction(cycle_direction(snake.get_head()))
+        snake.move()
+    return snake
+
+
+def measure(func, iterations):
+    """Best time per call in nanoseconds over several repeats"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best * 1e9
+
+
+def bench_snake(results, length):
+    snake = make_snake(length)
+
+    def move():
+        snake.set_direction(cycle_direction(snake.get_head()))
+        snake.move()
+
+    results[f'snake_move[len={length}]'] = measure(move, 2000)
+    results[f'snake_collides_with_self[len={length}]'] = measure(snake.collides_with_self, 5000)
+
+    food = Food()
+    fill = round(100 * length / (GRID_SIZE * GRID_SIZE))
+    results[f'food_randomize_position[fill={fill}%]'] = measure(
+        lambda: food.randomize_position(snake.free_cells), 2000)
+
+    surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE + 40))
+    results[f'snake_render[len={length}]'] = measure(lambda: snake.render(surface), 20)
+
+
+def bench_food_render(results):
+    surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE + 40))
+    food = Food()
+    food.position = (GRID_SIZE // 2, GRID_SIZE // 2)
+
+    def render():
+        food.update()
+        food.render(surface)
+
+    results['food_render[normal]'] = measure(render, 1000)
+    food.is_special = True
+    food.special_timer = 10 ** 9
+    results['food_render[special]'] = measure(render, 1000)
+
+
+def bench_game_render(results, screen):
+    from game import Game
+    from scores import ScoreStore
+    from state import Autosave
+    # Starting a game discards the autosave, so keep the player's files out of reach
+    with tempfile.TemporaryDirectory() as directory:
+        scores = ScoreStore(os.path.join(directory, 'scores.log'), os.path.join(directory, 'scores.json'))
+        autosave = Autosave(os.path.join(directory, 'autosave.snst'))
+        game = Game(screen, scores=scores, autosave=autosave)
+        game.start_new_game()
+        for length in SNAKE_LENGTHS:
+            game.sim.snake = make_snake(length)
+            results[f'game_render_game[len={length}]'] = measure(game.render_game, 20)
+        autosave.flush()
+        scores.close()
+
+
+def run_benchmarks():
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE + 40))
+    results = {}
+    for length in SNAKE_LENGTHS:
+        bench_snake(results, length)
+    bench_food_render(results)
+    bench_game_render(results, screen)
+    pygame.quit()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the names of benchmarks slower than baseline by more than tolerance"""
+    regressions = []
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:45s} {value:12.0f} ns   (new)")
+            continue
+        change = value / base - 1.0
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"  {name:45s} {value:12.0f} ns   {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snake game microbenchmarks')
+    parser.add_argument('--save', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='compare against a saved JSON result')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown before failing, as a fraction (default 0.25)')
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    report = {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            status = 1
+    else:
+        for name, value in sorted(results.items()):
+            print(f"  {name:45s} {value:12.0f} ns")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from utils import WINDOW_SIZE, CELL_SIZE
+
+class Camera:
+    """The part of the board shown in the window, following the snake head.
+
+    Positions are in cells. A board that fits the window is shown whole and
+    the camera never moves. Larger boards scroll once the head comes within
+    `margin` cells of the viewport edge. The board wraps, so the viewport may
+    straddle an edge.
+    """
+
+    def __init__(self, grid_size, view_cells=WINDOW_SIZE // CELL_SIZE):
+        self.grid_size = grid_size
+        self.view = min(view_cells, grid_size)
+        self.scrolls = grid_size > view_cells
+        self.margin = self.view // 4
+        self.x = 0
+        self.y = 0
+
+    @property
+    def offset(self):
+        return (self.x, self.y)
+
+    def follow(self, position):
+        """Scroll so that position stays away from the viewport edges"""
+        if self.scrolls:
+            self.x = self.track(self.x, position[0])
+            self.y = self.track(self.y, position[1])
+
+    def track(self, offset, coordinate):
+        relative = (coordinate - offset) % self.grid_size
+        if self.margin <= relative < self.view - self.margin:
+            return offset
+        # Re-center rather than creep, so scrolling happens in few large steps
+        return (coordinate - self.view // 2) % self.grid_size
+
+    def to_screen(self, position):
+        """Viewport cell of a board position, or None when it is off screen"""
+        x = (position[0] - self.x) % self.grid_size
+        y = (position[1] - self.y) % self.grid_size
+        if x >= self.view or y >= self.view:
+            return None
+        return (x, y)
+
+    def to_board(self, screen_position):
+        """Board position shown in a viewport cell"""
+        return ((screen_position[0] + self.x) % self.grid_size,
+                (screen_position[1] + self.y) % self.grid_size)
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+import pygame
+
+# Frames waiting for a writer; when full the oldest waiting frame is dropped
+CAPTURE_QUEUE_SIZE = 8
+
+# Writer threads encoding and saving frames
+CAPTURE_WORKERS = 2
+
+CAPTURE_FORMATS = ('png', 'raw')
+
+
+class FrameCapture:
+    """Saves presented frames to a directory without slowing the game loop.
+
+    capture() copies the surface's pixels out of its buffer view (one memory
+    copy, no conversion) and queues them; writer threads rebuild a surface
+    from the bytes, downscale it if asked and save it as PNG or as raw
+    pixels. Only every `every`-th frame is taken, and if the writers fall
+    behind the oldest waiting frame is dropped so the queue, and the time
+    capture() takes, stay bounded. close() writes capture.json with the
+    pixel layout, the time of each saved frame and the number dropped.
+    """
+
+    def __init__(self, directory, image_format='png', every=1, scale=1.0,
+                 workers=CAPTURE_WORKERS, queue_size=CAPTURE_QUEUE_SIZE):
+        if image_format not in CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture format {image_format!r}")
+        self.directory = directory
+        self.image_format = image_format
+        self.every = max(1, every)
+        self.scale = scale
+        self.queue = deque(maxlen=queue_size)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.presented = 0  # Frames offered, including skipped ones
+        self.captured = 0   # Frames queued; also the number of the next file
+        self.dropped = 0
+        self.written = {}   # Frame number -> capture time, for the frames saved
+        self.layout = None  # Size, depth, masks and pitch of the captured surface
+        self.scaled_pitch = None  # Row length in bytes of downscaled raw frames
+        os.makedirs(directory, exist_ok=True)
+        self.workers = [threading.Thread(target=self.write_loop, name=f'capture-writer-{i}', daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def capture(self, surface):
+        """Queue a copy of the surface's pixels; call right after the frame is shown"""
+        self.presented += 1
+        if (self.presented - 1) % self.every:
+            return
+        if self.layout is None:
+            self.layout = (surface.get_size(), surface.get_bitsize(), surface.get_masks(), surface.get_pitch())
+        pixels = bytes(surface.get_view('1'))
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append((self.captured, time.perf_counter(), pixels))
+            self.condition.notify()
+        self.captured += 1
+
+    def write_loop(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                number, timestamp, pixels = self.queue.popleft()
+            self.write(number, pixels)
+            with self.condition:
+                self.written[number] = timestamp
+
+    def write(self, number, pixels):
+        (width, height), depth, masks, pitch = self.layout
+        if self.scale == 1.0 and self.image_format == 'raw':
+            data = pixels
+        else:
+            image = pygame.Surface((width, height), 0, depth, masks)
+            image.get_buffer().write(pixels)
+            if self.scale != 1.0:
+                image = pygame.transform.smoothscale(image, self.scaled_size())
+            if self.image_format == 'png':
+                pygame.image.save(image, self.frame_path(number))
+                return
+            self.scaled_pitch = image.get_pitch()
+            data = bytes(image.get_view('1'))
+        with open(self.frame_path(number), 'wb') as f:
+            f.write(data)
+
+    def scaled_size(self):
+        (width, height), _, _, _ = self.layout
+        return (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+
+    def frame_path(self, number):
+        return os.path.join(self.directory, f"frame_{number:06d}.{self.image_format}")
+
+    def close(self):
+        """Finish writing the queued frames and write capture.json"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join()
+        if self.layout is None:
+            return
+        (width, height), depth, masks, pitch = self.layout
+        if self.scale != 1.0:
+            width, height = self.scaled_size()
+            pitch = self.scaled_pitch
+        start = min(self.written.values(), default=0.0)
+        with open(os.path.join(self.directory, 'capture.json'), 'w') as f:
+            json.dump({
+                'format': self.image_format,
+                'width': width,
+                'height': height,
+                'bits_per_pixel': depth,
+                'pitch': pitch,
+                'masks': masks,
+                'every': self.every,
+                'frames': {number: self.written[number] - start for number in sorted(self.written)},
+                'dropped': self.dropped,
+            }, f, indent=2)
@@ -0,0 +1,121 @@
+import random
+from array import array
+from itertools import chain
+
+# Moved entries allowed beyond four per occupied cell before the index is rebuilt
+COMPACT_SLACK = 1024
+
+class FreeCellIndex:
+    """Set of free board cells with constant time add, remove and random pick.
+
+    Free cells are packed at the front of a virtual array of all cells; a cell
+    is removed by swapping it with the last free one. Slots that were never
+    swapped hold their own index, so only moved entries are stored and a new
+    index costs nothing even on very large boards.
+    
+    Cells shuffled around the free part stay moved, so a long game leaves
+    entries behind for every cell it passed. Once there are more than four
+    per occupied cell (plus COMPACT_SLACK), compact() rebuilds the index
+    with at most two, keeping its size, snapshots and saves in proportion
+    to the snake rather than to the distance it travelled.
+    """
+
+    def __init__(self, num_cells):
+        self.num_cells = num_cells
+        self.cells = {}      # slot -> cell, for slots whose cell has moved
+        self.positions = {}  # cell -> slot, for cells that have moved
+        self.count = num_cells
+
+    def copy(self):
+        other = FreeCellIndex.__new__(FreeCellIndex)
+        other.num_cells = self.num_cells
+        other.cells = dict(self.cells)
+        other.positions = dict(self.positions)
+        other.count = self.count
+        return other
+
+    def moved(self):
+        """Packed slot, cell pairs of every moved entry; with the count they fix the layout"""
+        return array('I', chain.from_iterable(self.cells.items()))
+
+    @classmethod
+    def from_moved(cls, num_cells, count, pairs):
+        """Rebuild an index saved with moved(), including the order random picks see"""
+        index = cls(num_cells)
+        index.count = count
+        for i in range(0, len(pairs), 2):
+            index.cells[pairs[i]] = pairs[i + 1]
+            index.positions[pairs[i + 1]] = pairs[i]
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def cell_at(self, slot):
+        return self.cells.get(slot, slot)
+
+    def slot_of(self, cell):
+        return self.positions.get(cell, cell)
+
+    def place(self, cell, slot):
+        if cell == slot:
+            self.cells.pop(slot, None)
+            self.positions.pop(cell, None)
+        else:
+            self.cells[slot] = cell
+            self.positions[cell] = slot
+
+    def is_free(self, cell):
+        return self.slot_of(cell) < self.count
+
+    def occupy(self, cell):
+        """Remove a cell from the free set"""
+        slot = self.slot_of(cell)
+        if slot >= self.count:
+            return
+        last = self.count - 1
+        self.place(self.cell_at(last), slot)
+        self.place(cell, last)
+        self.count = last
+        self.compact_if_grown()
+
+    def release(self, cell):
+        """Add a cell back to the free set"""
+        slot = self.slot_of(cell)
+        if slot < self.count:
+            return
+        self.place(self.cell_at(self.count), slot)
+        self.place(cell, self.count)
+        self.count += 1
+        self.compact_if_grown()
+
+    def compact_if_grown(self):
+        if len(self.cells) > 4 * (self.num_cells - self.count) + COMPACT_SLACK:
+            self.compact()
+
+    def compact(self):
+        """Rebuild with the fewest moved entries for the same free cells.
+
+        Each occupied cell whose own slot is in the free part swaps places
+        with a free cell whose own slot is not, pairing both in cell order,
+        so the new layout only depends on which cells are free and games
+        stay reproducible.
+        """
+        count = self.count
+        occupied = [self.cell_at(slot) for slot in range(count, self.num_cells)]
+        taken = set(occupied)
+        inside = sorted(cell for cell in occupied if cell < count)
+        outside = [cell for cell in range(count, self.num_cells) if cell not in taken]
+        self.cells = {}
+        self.positions = {}
+        for cell, slot in zip(inside, outside):
+            self.cells[slot] = cell
+            self.positions[cell] = slot
+            self.cells[cell] = slot
+            self.positions[slot] = cell
+
+    def choice(self, rng=random):
+        """Return a uniformly random free cell, or None when the board is full"""
+        if self.count == 0:
+            return None
+        return self.cell_at(rng.randrange(self.count))
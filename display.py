@@ -0,0 +1,80 @@
+import pygame
+from utils import WINDOW_SIZE, BLACK
+
+# Size everything is drawn at: the board plus the status bar below it
+LOGICAL_SIZE = (WINDOW_SIZE, WINDOW_SIZE + 40)
+
+
+class Display:
+    """Window showing a fixed-size logical canvas at any window size.
+
+    The game, menus and status bar always draw to `canvas`, which is
+    LOGICAL_SIZE whatever the window is, so their cost does not depend on
+    the display resolution. present() copies the canvas into the window in
+    one pass: a plain blit of the dirty rects when the window has the
+    logical size, otherwise one nearest-neighbour scale into the largest
+    centred area with the same aspect ratio, leaving black bars at the
+    sides. to_logical() maps window positions, such as the mouse, back to
+    canvas coordinates.
+    """
+
+    def __init__(self, size=LOGICAL_SIZE, fullscreen=False):
+        self.windowed_size = size
+        self.fullscreen = fullscreen
+        self.canvas = None
+        self.open()
+
+    def open(self):
+        if self.fullscreen:
+            pygame.display.set_mode((0, 0), pygame.FULLSCREEN)  # Desktop resolution
+        else:
+            pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        if self.canvas is None:
+            # Created once the window exists so it can match its pixel format
+            self.canvas = pygame.Surface(LOGICAL_SIZE).convert()
+        self.layout()
+
+    def layout(self):
+        """Fit the canvas to the current window size; call after the window was resized"""
+        self.window = pygame.display.get_surface()
+        width, height = self.window.get_size()
+        scale = min(width / LOGICAL_SIZE[0], height / LOGICAL_SIZE[1])
+        self.viewport = pygame.Rect(0, 0, round(LOGICAL_SIZE[0] * scale), round(LOGICAL_SIZE[1] * scale))
+        self.viewport.center = (width // 2, height // 2)
+        self.scaled = self.viewport.size != LOGICAL_SIZE
+        # Scaling writes straight into the window's pixels, without a temporary surface
+        self.target = self.window.subsurface(self.viewport) if self.scaled else None
+        self.window.fill(BLACK)
+        self.full_update = True  # The bars have to be shown once
+
+    def toggle_fullscreen(self):
+        self.fullscreen = not self.fullscreen
+        self.open()
+
+    def present(self, rects=None):
+        """Show the canvas, either in full or only the given dirty rects"""
+        if self.full_update:
+            rects = None
+        if self.scaled:
+            pygame.transform.scale(self.canvas, self.viewport.size, self.target)
+            if rects is not None:
+                rects = [self.viewport]
+        elif rects is None:
+            self.window.blit(self.canvas, self.viewport)
+        else:
+            # Canvas rects, moved to where the canvas sits in the window
+            areas = rects
+            rects = [area.move(self.viewport.topleft) for area in areas]
+            for rect, area in zip(rects, areas):
+                self.window.blit(self.canvas, rect, area)
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.full_update = False
+
+    def to_logical(self, position):
+        """Canvas coordinates of a window position; outside the canvas for the bars"""
+        x, y = position
+        return ((x - self.viewport.x) * LOGICAL_SIZE[0] // self.viewport.width,
+                (y - self.viewport.y) * LOGICAL_SIZE[1] // self.viewport.height)
@@ -0,0 +1,230 @@
+import numpy as np
+from rules import GRID_SIZE, FPS, SPECIAL_FOOD_DURATION, SPECIAL_FOOD_SPAWN_CHANCE, SPECIAL_FOOD_GROWTH_BONUS
+
+# Direction codes used by the batch engine (same vectors as Snake.direction)
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int32)
+OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int8)
+
+# Rule constants mirrored from Game.update_game
+SPECIAL_FOOD_SCORE = 5
+SPECIAL_FOOD_CHECK_INTERVAL = 3
+SPEED_UP_INTERVAL = 5
+SPEED_UP_STEP = 2
+MAX_SPEED_BONUS = 10
+
+
+def direction_code(direction):
+    """Convert a Snake direction tuple into a batch engine direction code"""
+    return {(0, -1): UP, (0, 1): DOWN, (-1, 0): LEFT, (1, 0): RIGHT}[tuple(direction)]
+
+
+class BatchEngine:
+    """Steps many independent snake games at once without pygame.
+
+    Every game follows the rules of Game/Snake/Food: wall wrapping, self
+    collision, normal and special food, special food timers and the speed
+    up rule. Board state lives in NumPy arrays and each tick is a handful of
+    array operations over all games that are still running.
+    """
+
+    def __init__(self, num_games, grid_size=GRID_SIZE, speed=FPS,
+                 special_food_chance=SPECIAL_FOOD_SPAWN_CHANCE,
+                 special_food_duration=SPECIAL_FOOD_DURATION,
+                 growth_bonus=SPECIAL_FOOD_GROWTH_BONUS, seed=None):
+        self.num_games = num_games
+        self.grid_size = grid_size
+        self.num_cells = grid_size * grid_size
+        # One spare slot so the new head can be written before the tail pops
+        self.capacity = self.num_cells + 1
+        self.rng = np.random.default_rng(seed)
+
+        # Per-game settings (scalars are broadcast to every game)
+        self.base_speed = self._per_game(speed, np.int32)
+        self.special_food_chance = self._per_game(special_food_chance, np.float64)
+        self.special_food_duration = self._per_game(special_food_duration, np.int32)
+        self.growth_bonus = self._per_game(growth_bonus, np.int32)
+
+        # Snake bodies as ring buffers of cell indices (y * grid_size + x)
+        n = num_games
+        self.body = np.zeros((n, self.capacity), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.occupied = np.zeros((n, self.num_cells), dtype=bool)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.grow_pending = np.zeros(n, dtype=np.int32)
+
+        # Food state
+        self.food = np.zeros(n, dtype=np.int64)
+        self.food_special = np.zeros(n, dtype=bool)
+        self.special_timer = np.zeros(n, dtype=np.int32)
+
+        # Game progress
+        self.score = np.zeros(n, dtype=np.int32)
+        self.speed = np.zeros(n, dtype=np.int32)
+        self.alive = np.zeros(n, dtype=bool)
+        self.board_full = np.zeros(n, dtype=bool)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.seconds = np.zeros(n, dtype=np.float64)  # Play time at the game's changing speed
+
+        # Statistics
+        self.food_eaten = np.zeros(n, dtype=np.int32)
+        self.special_eaten = np.zeros(n, dtype=np.int32)
+        self.special_spawned = np.zeros(n, dtype=np.int32)
+
+        self.reset()
+
+    @classmethod
+    def from_settings(cls, num_games, settings, **kwargs):
+        """Create an engine from a Menu.get_settings() style dictionary"""
+        return cls(
+            num_games,
+            speed=settings['speed'],
+            special_food_chance=settings['special_food_chance'] / 100.0,
+            special_food_duration=settings['special_food_duration'] * 10,
+            **kwargs
+        )
+
+    def _per_game(self, value, dtype):
+        return np.broadcast_to(np.asarray(value, dtype=dtype), (self.num_games,)).copy()
+
+    def reset(self, games=None):
+        """Reset the given games (all games by default) to a fresh start"""
+        if games is None:
+            games = np.arange(self.num_games)
+        games = np.asarray(games, dtype=np.int64)
+        if games.size == 0:
+            return
+
+        center = (self.grid_size // 2) * self.grid_size + self.grid_size // 2
+        self.body[games, 0] = center
+        self.head_ptr[games] = 0
+        self.length[games] = 1
+        self.occupied[games] = False
+        self.occupied[games, center] = True
+        self.direction[games] = UP
+        self.grow_pending[games] = 0
+
+        # Food() places its first item before the snake exists, so any cell is allowed
+        self.food[games] = self.rng.integers(0, self.num_cells, size=games.size)
+        self.food_special[games] = False
+        self.special_timer[games] = 0
+
+        self.score[games] = 0
+        self.speed[games] = self.base_speed[games]
+        self.alive[games] = True
+        self.board_full[games] = False
+        self.ticks[games] = 0
+        self.seconds[games] = 0.0
+        self.food_eaten[games] = 0
+        self.special_eaten[games] = 0
+        self.special_spawned[games] = 0
+
+    def step(self, actions=None):
+        """Advance every running game by one tick.
+
+        actions is an optional array of direction codes, one per game. Use -1
+        to keep the current direction. Reversals are ignored like in
+        Snake.set_direction.
+        """
+        games = np.flatnonzero(self.alive)
+        if games.size == 0:
+            return
+
+        # Food.update: count down the special food timer
+        special = self.food_special[games]
+        self.special_timer[games] -= special
+        expired = games[special & (self.special_timer[games] <= 0)]
+        self.food_special[expired] = False
+
+        # Snake.set_direction
+        if actions is not None:
+            requested = np.asarray(actions)[games]
+            valid = (requested >= 0) & (requested != OPPOSITE[self.direction[games]])
+            self.direction[games[valid]] = requested[valid]
+
+        # Snake.move with wall wrapping
+        g = self.grid_size
+        heads = self.body[games, self.head_ptr[games]]
+        delta = DIRECTIONS[self.direction[games]]
+        new_x = (heads % g + delta[:, 0]) % g
+        new_y = (heads // g + delta[:, 1]) % g
+        new_heads = new_y * g + new_x
+
+        growing = self.grow_pending[games] > 0
+        self.grow_pending[games[growing]] -= 1
+        popping = games[~growing]
+        tails = self.body[popping, (self.head_ptr[popping] + self.length[popping] - 1) % self.capacity]
+        self.occupied[popping, tails] = False
+        self.length[popping] -= 1
+
+        # Snake.collides_with_self: the new head hits what is left of the body
+        collided = self.occupied[games, new_heads]
+
+        self.head_ptr[games] = (self.head_ptr[games] - 1) % self.capacity
+        self.body[games, self.head_ptr[games]] = new_heads
+        self.occupied[games, new_heads] = True
+        self.length[games] += 1
+        self.ticks[games] += 1
+        self.seconds[games] += 1.0 / self.speed[games]
+        self.alive[games[collided]] = False
+
+        # Food collision
+        games = games[~collided]
+        eaters = games[new_heads[~collided] == self.food[games]]
+        if eaters.size == 0:
+            return
+
+        ate_special = self.food_special[eaters]
+        self.grow_pending[eaters] += np.where(ate_special, self.growth_bonus[eaters], 1)
+        self.score[eaters] += np.where(ate_special, SPECIAL_FOOD_SCORE, 1)
+        self.food_eaten[eaters] += 1
+        self.special_eaten[eaters] += ate_special
+        self._spawn_food(eaters)
+
+        # Special food roll, only while no special food is active
+        eaters = eaters[self.alive[eaters]]
+        checks = eaters[~self.food_special[eaters] & (self.score[eaters] % SPECIAL_FOOD_CHECK_INTERVAL == 0)]
+        spawned = checks[self.rng.random(checks.size) < self.special_food_chance[checks]]
+        self.food_special[spawned] = True
+        self.special_timer[spawned] = self.special_food_duration[spawned]
+        self.special_spawned[spawned] += 1
+        self._spawn_food(spawned)
+
+        # Speed increases every few points, capped relative to the base speed
+        faster = eaters[self.score[eaters] % SPEED_UP_INTERVAL == 0]
+        self.speed[faster] = np.minimum(self.speed[faster] + SPEED_UP_STEP,
+                                        self.base_speed[faster] + MAX_SPEED_BONUS)
+
+    def _spawn_food(self, games):
+        """Move food to a uniformly random free cell; a full board ends the game"""
+        if games.size == 0:
+            return
+        free = ~self.occupied[games]
+        counts = free.sum(axis=1)
+        picks = (self.rng.random(games.size) * counts).astype(np.int64)
+        # Index of the (pick + 1)-th free cell in each row
+        cells = (np.cumsum(free, axis=1) <= picks[:, None]).sum(axis=1)
+
+        full = counts == 0
+        self.food[games] = np.where(full, -1, cells)
+        self.board_full[games[full]] = True
+        self.alive[games[full]] = False
+
+    def run(self, policy, max_ticks):
+        """Step all games with policy(engine) -> actions until they end or max_ticks pass"""
+        for _ in range(max_ticks):
+            if not self.alive.any():
+                break
+            self.step(policy(self))
+
+    def heads(self):
+        """Return the (x, y) head coordinates of every game"""
+        heads = self.body[np.arange(self.num_games), self.head_ptr]
+        return heads % self.grid_size, heads // self.grid_size
+
+    def get_body(self, game):
+        """Return one game's body as a list of (x, y) tuples, head first"""
+        ptr, length = self.head_ptr[game], self.length[game]
+        cells = self.body[game, (ptr + np.arange(length)) % self.capacity]
+        return [(int(c % self.grid_size), int(c // self.grid_size)) for c in cells]
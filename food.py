@@ -1,31 +1,99 @@
 import pygame
 import random
+from sprites import atlas
 from utils import CELL_SIZE, GRID_SIZE, RED, GOLD, PURPLE, WHITE, ease_in_out, FOOD_ANIMATION_DURATION
 
+# Special food flashes purple for its last 60 ticks
+SPECIAL_FOOD_WARNING = 60
+
+# Food looks: fill color, sparkle color (None for no sparkles) and size factor
+FOOD_VARIANTS = {
+    'normal': (RED, None, 1.0),
+    'special': (GOLD, WHITE, 1.5),
+    'expiring': (PURPLE, PURPLE, 1.5),
+}
+
+# Baked frames are twice the cell size, centered on the cell
+FOOD_FRAME_SIZE = CELL_SIZE * 2
+
+
+def food_scale(progress, size=1.0):
+    """Draw scale relative to one cell at a point of the pulse animation"""
+    return (0.8 + 0.4 * ease_in_out(progress)) * size
+
+
+def draw_food_frame(surface, center, scale, color, sparkle_color=None):
+    """Draw one food image centered on a pixel position"""
+    half = int(CELL_SIZE * scale / 2)
+    size = int(CELL_SIZE * scale)
+    rect = pygame.Rect(center[0] - half, center[1] - half, size, size)
+    pygame.draw.rect(surface, color, rect)
+    pygame.draw.rect(surface, (0, 0, 0), rect, 2)
+    
+    if sparkle_color is not None:
+        # Draw 4 sparkles around the food
+        sparkle_size = int(CELL_SIZE * scale * 0.3)
+        for dx in (-sparkle_size, sparkle_size):
+            for dy in (-sparkle_size, sparkle_size):
+                pygame.draw.circle(surface, sparkle_color, (center[0] + dx, center[1] + dy), 2)
+
+
+def bake_food_frames(variant):
+    """Every animation phase of one food variant, for the sprite atlas"""
+    color, sparkle_color, size = FOOD_VARIANTS[variant]
+    frames = []
+    for timer in range(FOOD_ANIMATION_DURATION):
+        frame = pygame.Surface((FOOD_FRAME_SIZE, FOOD_FRAME_SIZE), pygame.SRCALPHA)
+        scale = food_scale(timer / FOOD_ANIMATION_DURATION, size)
+        draw_food_frame(frame, (FOOD_FRAME_SIZE // 2, FOOD_FRAME_SIZE // 2), scale, color, sparkle_color)
+        frames.append(frame)
+    offset = (CELL_SIZE // 2 - FOOD_FRAME_SIZE // 2,) * 2
+    return frames, offset
+
+
+def food_frames(variant):
+    return atlas.get(('food', variant), lambda: bake_food_frames(variant))
+
 class Food:
-    def __init__(self):
+    __slots__ = ('grid_size', 'rng', 'position', 'animation_timer', 'animation_duration',
+                 'is_special', 'special_timer', 'special_duration')
+
+    def __init__(self, rng=None, grid_size=GRID_SIZE):
+        self.grid_size = grid_size
+        # Random source for placement; a seeded random.Random makes games reproducible
+        self.rng = rng if rng is not None else random
         self.position = (0, 0)
         self.animation_timer = 0
         self.animation_duration = FOOD_ANIMATION_DURATION
         self.is_special = False
         self.special_timer = 0
         self.special_duration = 300  # Default 30 seconds at 10 FPS
-        self.randomize_position([])
-
-    def randomize_position(self, snake_body):
-        while True:
-            x = random.randint(0, GRID_SIZE - 1)
-            y = random.randint(0, GRID_SIZE - 1)
-            if (x, y) not in snake_body:
-                self.position = (x, y)
-                self.animation_timer = 0  # Reset animation when food moves
-                break
-
-    def spawn_special_food(self, snake_body, duration=None):
+        # Placed before the snake exists, so any cell will do
+        self.position = (self.rng.randint(0, grid_size - 1), self.rng.randint(0, grid_size - 1))
+
+    def clone(self, rng):
+        """Copy that draws its positions from rng"""
+        other = Food.__new__(Food)
+        for name in Food.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.rng = rng
+        return other
+
+    def randomize_position(self, free_cells):
+        """Move the food to a random cell of a FreeCellIndex of the cells not covered by the snake.
+
+        Returns False and clears the position when the board is full.
+        """
+        cell = free_cells.choice(self.rng)
+        self.position = None if cell is None else (cell % self.grid_size, cell // self.grid_size)
+        self.animation_timer = 0  # Reset animation when food moves
+        return self.position is not None
+
+    def spawn_special_food(self, free_cells, duration=None):
         """Spawn a special food item with optional custom duration"""
         self.is_special = True
         self.special_timer = duration if duration is not None else self.special_duration
-        self.randomize_position(snake_body)
+        return self.randomize_position(free_cells)
 
     def set_special_duration(self, duration):
         """Set the default special food duration"""
@@ -41,49 +109,33 @@ class Food:
             if self.special_timer <= 0:
                 self.is_special = False
 
-    def render(self, surface):
-        x, y = self.position
-        rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        
-        # Calculate animation scale
-        animation_progress = self.animation_timer / self.animation_duration
-        base_scale = 0.8 + 0.4 * ease_in_out(animation_progress)
-        
-        # Special food is larger and has different animation
-        if self.is_special:
-            # Special food is 1.5x larger and has pulsing effect
-            scale = base_scale * 1.5
-            color = GOLD if self.special_timer > 60 else PURPLE  # Flash when about to disappear
-        else:
-            scale = base_scale
-            color = RED
-        
-        # Draw animated colored rectangle
-        scaled_rect = pygame.Rect(
-            rect.centerx - int(CELL_SIZE * scale / 2),
-            rect.centery - int(CELL_SIZE * scale / 2),
-            int(CELL_SIZE * scale),
-            int(CELL_SIZE * scale)
-        )
-        pygame.draw.rect(surface, color, scaled_rect)
-        pygame.draw.rect(surface, (0, 0, 0), scaled_rect, 2)
-        
-        # Add sparkle effect for special food
-        if self.is_special:
-            self.draw_sparkles(surface, rect.center, scale)
+    def variant(self):
+        if not self.is_special:
+            return 'normal'
+        return 'special' if self.special_timer > SPECIAL_FOOD_WARNING else 'expiring'
 
-    def draw_sparkles(self, surface, center, scale):
-        """Draw sparkle effect around special food"""
-        sparkle_size = int(CELL_SIZE * scale * 0.3)
-        sparkle_color = WHITE if self.special_timer > 60 else PURPLE
-        
-        # Draw 4 sparkles around the food
-        sparkle_positions = [
-            (center[0] - sparkle_size, center[1] - sparkle_size),
-            (center[0] + sparkle_size, center[1] - sparkle_size),
-            (center[0] - sparkle_size, center[1] + sparkle_size),
-            (center[0] + sparkle_size, center[1] + sparkle_size)
-        ]
-        
-        for pos in sparkle_positions:
-            pygame.draw.circle(surface, sparkle_color, pos, 2) 
\ No newline at end of file
+    def get_frame(self, alpha=0.0):
+        """Baked image for the current animation phase, alpha ticks after the last update"""
+        phase = int(self.animation_timer + alpha + 0.5) % self.animation_duration
+        return food_frames(self.variant())[phase]
+
+    def screen_position(self, camera=None):
+        """Viewport cell of the food, or None when there is none or it is off screen"""
+        if self.position is None or camera is None:
+            return self.position
+        return camera.to_screen(self.position)
+
+    def get_bounds(self, camera=None, alpha=0.0):
+        """Screen area touched by render with the same alpha, including sparkles"""
+        screen_position = self.screen_position(camera)
+        if screen_position is None:
+            return pygame.Rect(0, 0, 0, 0)
+        x, y = screen_position
+        return self.get_frame(alpha).bounds.move(x * CELL_SIZE, y * CELL_SIZE)
+
+    def render(self, surface, alpha=0.0, camera=None):
+        screen_position = self.screen_position(camera)
+        if screen_position is None:
+            return
+        x, y = screen_position
+        atlas.blit(surface, self.get_frame(alpha), (x * CELL_SIZE, y * CELL_SIZE))
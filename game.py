@@ -1,77 +1,263 @@
+import math
 import pygame
-import random
-from snake import Snake
-from food import Food
+import time
+from simulation import Simulation
+from replay import Replay, ReplayError, ReplayRecorder, ReplayPlayback, ReplayWriter
 from menu import Menu
+from renderer import Playfield, DirtyRectRenderer
+from camera import Camera
+from food import FOOD_VARIANTS, food_frames
+from snake import segment_tile
+from latency import LatencyTracer
+from autopilot import Autopilot
+from scores import ScoreStore
+from state import Autosave, AUTOSAVE_INTERVAL
+from profiler import FrameProfiler, NullProfiler
+from telemetry import NullTelemetry
 from utils import *
 
+# Arrow keys and the direction they turn the snake
+KEY_DIRECTIONS = {
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+}
+
 class Game:
-    def __init__(self, surface):
+    def __init__(self, surface, dirty_rects=False, trace_latency=False, profile=False, grid_size=GRID_SIZE,
+                 autopilot=False, startup=None, stream=None, telemetry=None, capture=None, display=None,
+                 scores=None, autosave=None):
         self.surface = surface
+        # Optional Display whose logical canvas is `surface`, scaled to the window when shown
+        self.display = display
+        self.grid_size = grid_size
+        # Optional time-to-first-frame breakdown, dropped once the first frame is shown
+        self.startup = startup
+        self.status_bar_rect = pygame.Rect(0, WINDOW_SIZE, WINDOW_SIZE, 40)
+        # Grid and snake body, updated incrementally from the snake's change log
+        self.playfield = Playfield()
+        # Optional renderer that only repaints changed cells while playing
+        self.renderer = DirtyRectRenderer(surface) if dirty_rects else None
+        # Optional key-to-screen latency measurement
+        self.latency = LatencyTracer() if trace_latency else None
+        # Optional SpectatorServer that every tick is published to
+        self.stream = stream
+        # Structured game events for later statistics; written in the background
+        self.telemetry = telemetry or NullTelemetry()
+        # Optional FrameCapture that saves every shown frame in the background
+        self.capture = capture
+        # Per-phase frame timing; F3 toggles its overlay
+        self.profiler = FrameProfiler() if profile else NullProfiler()
+        # Bake every sprite now, not mid-game the first time each one is drawn
+        for variant in FOOD_VARIANTS:
+            food_frames(variant)
+        segment_tile(True)
+        segment_tile(False)
+        self.mark_startup('playfield')
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont('consolas', 24)
-        self.big_font = pygame.font.SysFont('consolas', 48, bold=True)
+        self.font = get_font(24)
+        self.big_font = get_font(48, bold=True)
+        self.mark_startup('fonts')
         
         # Initialize menu system
         self.menu = Menu(surface)
+        self.mark_startup('menu')
+        
+        # Leaderboard, loaded once and written in the background
+        self.scores = scores if scores is not None else ScoreStore()
+        self.mark_startup('scores')
+        
+        # Running game kept on disk in the background, continued after a crash
+        self.autosave = autosave if autosave is not None else Autosave()
+        
+        # Finished games' replays, written in the background
+        self.replays = ReplayWriter()
         
         # Game state
         self.state = 'MENU'  # MENU, PLAYING, PAUSED, GAME_OVER
+        
+        # Fixed timestep: unsimulated time and how far we are into the next tick
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        
+        # Replay being played back instead of keyboard input, if any
+        self.playback = None
+        self.playback_speed = 1
+        
+        # Steers the snake instead of the arrow keys while enabled; F2 toggles it
+        self.autopilot_enabled = autopilot
+        self.autopilot = None
         self.reset()
+        self.resume_autosave()
         
         # Mouse tracking
         self.mouse_pos = (0, 0)
         self.mouse_clicked = False
         self.mouse_down = False
-
-    def reset(self):
-        self.snake = Snake()
-        self.food = Food()
-        self.score = 0
-        self.high_score = load_high_score()
+        self.mouse_event = False  # Any mouse event this frame; menus only hit-test then
         
-        # Get settings from menu
-        settings = self.menu.get_settings()
-        self.speed = settings['speed']
-        self.special_food_chance = settings['special_food_chance'] / 100.0  # Convert to decimal
-        self.special_food_duration = settings['special_food_duration'] * 10  # Convert to frames
+        # Outside of play the loop sleeps until input or the next tick, and
+        # only redraws when something on screen changed
+        self.pending_event = None
+        self.redraw = True
+        self.mark_startup('game')
+
+    def mark_startup(self, phase):
+        if self.startup:
+            self.startup.mark(phase)
+
+    def reset(self, seed=None):
+        # Game rules and state live in a seeded simulation; every game is recorded
+        self.sim = Simulation(self.menu.get_settings(), seed, self.grid_size, self.telemetry)
+        self.recorder = ReplayRecorder(self.sim)
+        # Boards larger than the window scroll to follow the head
+        self.camera = Camera(self.grid_size)
+        self.playback = None
+        self.high_score = self.scores.high_score()
+
+    def resume_autosave(self):
+        """Continue the game left by a crash or quit, paused"""
+        saved = self.autosave.load()
+        if saved is None:
+            return
+        state, replay_data = saved
+        try:
+            replay = Replay.from_bytes(replay_data)
+        except ReplayError as e:
+            print(f"Ignoring autosave with an unreadable replay: {e}")
+            return
+        self.sim = Simulation.from_state(state, self.telemetry)
+        # The replay continues from the saved events, so it still verifies
+        self.recorder = ReplayRecorder(self.sim, replay.events)
+        self.camera = Camera(self.sim.grid_size)
+        self.record_game_start(resumed=True)
+        self.set_state('PAUSED')
+        self.menu.set_state('PAUSE')
+
+    def save_game(self):
+        """Autosave the running game; only the snapshot is taken on this thread"""
+        if self.playback:
+            return
+        self.autosave.save(self.sim.snapshot(), self.recorder.finish(None, None))
+
+    def set_state(self, state):
+        if state != self.state:
+            self.telemetry.record('state', tick=self.sim.ticks, previous=self.state, state=state)
+        self.state = state
+
+    def record_game_start(self, resumed=False):
+        self.telemetry.record('game_start', tick=self.sim.ticks, seed=self.sim.seed, settings=self.sim.settings,
+                              grid_size=self.sim.grid_size, resumed=resumed)
+
+    @property
+    def snake(self):
+        return self.sim.snake
+
+    @property
+    def food(self):
+        return self.sim.food
+
+    @property
+    def score(self):
+        return self.sim.score
+
+    @property
+    def speed(self):
+        return self.sim.speed
+
+    @property
+    def special_food_chance(self):
+        return self.sim.special_food_chance
+
+    def start_replay(self, replay, speed=1):
+        """Play a recorded game on screen at speed times its original pace"""
+        self.reset()
+        self.sim = Simulation(replay.settings, replay.seed, replay.grid_size)
+        self.camera = Camera(replay.grid_size)
+        self.recorder = None
+        self.playback = ReplayPlayback(replay)
+        self.playback_speed = speed
+        self.accumulator = 0.0
+        self.set_state('PLAYING')
+
+    def wait_for_event(self):
+        """Sleep until input arrives or the next tick is due"""
+        if self.state == 'MENU':
+            timeout = MENU_IDLE_TIMEOUT
+        else:
+            # The paused or finished game still animates in the background
+            timeout = max(1, math.ceil((self.tick_length() - self.accumulator) * 1000))
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            self.pending_event = event
 
     def handle_events(self):
         self.mouse_clicked = False
+        self.mouse_event = False
         
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if self.pending_event is not None:
+            events.insert(0, self.pending_event)
+            self.pending_event = None
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
             elif event.type == pygame.KEYDOWN:
-                self.handle_keydown(event.key)
+                self.handle_keydown(event.key, time.perf_counter() if self.latency else None)
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.mouse_event = True
+                self.mouse_pos = self.to_logical(event.pos)
                 if event.button == 1:  # Left click
                     self.mouse_clicked = True
                     self.mouse_down = True
             elif event.type == pygame.MOUSEBUTTONUP:
+                self.mouse_event = True
+                self.mouse_pos = self.to_logical(event.pos)
                 if event.button == 1:  # Left click release
                     self.mouse_down = False
             elif event.type == pygame.MOUSEMOTION:
-                self.mouse_pos = event.pos
+                self.mouse_event = True
+                self.mouse_pos = self.to_logical(event.pos)
+            elif event.type == pygame.VIDEORESIZE and self.display:
+                self.display.layout()
+            if event.type != pygame.MOUSEMOTION:
+                # Key presses and window events (expose, resize, focus) may change
+                # what is shown; hover changes are tracked by the menu itself
+                self.redraw = True
                 
         return True
 
-    def handle_keydown(self, key):
+    def to_logical(self, position):
+        """Canvas coordinates of a mouse position in the window"""
+        return self.display.to_logical(position) if self.display else position
+
+    def handle_keydown(self, key, timestamp=None):
+        if key == pygame.K_F11 and self.display:
+            self.display.toggle_fullscreen()
+            return
+        if key == pygame.K_F3:
+            self.profiler.toggle_overlay()
+            return
+        if key == pygame.K_F2:
+            self.autopilot_enabled = not self.autopilot_enabled
+            return
+        
         if self.state == 'PLAYING':
-            if key == pygame.K_UP:
-                self.snake.set_direction((0, -1))
-            elif key == pygame.K_DOWN:
-                self.snake.set_direction((0, 1))
-            elif key == pygame.K_LEFT:
-                self.snake.set_direction((-1, 0))
-            elif key == pygame.K_RIGHT:
-                self.snake.set_direction((1, 0))
+            if key in KEY_DIRECTIONS:
+                # Replays and the autopilot ignore the keyboard
+                if self.playback or self.autopilot_enabled:
+                    return
+                direction = KEY_DIRECTIONS[key]
+                if self.snake.queue_direction(direction, timestamp):
+                    self.recorder.record_turn(direction)
             elif key == pygame.K_ESCAPE:
-                self.state = 'PAUSED'
+                self.set_state('PAUSED')
                 self.menu.set_state('PAUSE')
+                self.save_game()
         elif self.state == 'PAUSED':
             if key == pygame.K_ESCAPE:
-                self.state = 'PLAYING'
+                self.set_state('PLAYING')
         elif self.state == 'GAME_OVER':
             if key == pygame.K_SPACE:
                 self.restart_game()
@@ -79,129 +265,182 @@ class Game:
             if key == pygame.K_SPACE:
                 self.start_new_game()
 
-    def update(self):
-        # Update food animation
-        self.food.update()
-        
-        # Handle menu interactions
-        if self.state in ['MENU', 'PAUSED', 'GAME_OVER']:
+    def update(self, dt=None):
+        """Handle menu input every frame and advance the simulation by dt seconds.
+
+        Without dt exactly one simulation tick is run.
+        """
+        # Handle menu interactions; hit-testing only matters when the mouse did something
+        if self.state in ['MENU', 'PAUSED', 'GAME_OVER'] and self.mouse_event:
             menu_action = self.menu.update(self.mouse_pos, self.mouse_clicked, self.mouse_down)
             if menu_action == 'QUIT':
                 return False
             elif menu_action == 'PLAY':
                 self.start_new_game()
             elif menu_action == 'RESUME':
-                self.state = 'PLAYING'
+                self.set_state('PLAYING')
             elif menu_action == 'RESTART':
                 self.restart_game()
             elif menu_action == 'MENU':
-                self.state = 'MENU'
+                self.autosave.discard()
+                self.set_state('MENU')
                 self.menu.set_state('MAIN')
+        self.profiler.mark('menu')
+        
+        # Run as many fixed-length ticks as the elapsed time covers
+        tick_length = self.tick_length()
+        self.accumulator += tick_length if dt is None else dt
+        ticks = 0
+        while self.accumulator >= tick_length:
+            if ticks == MAX_TICKS_PER_FRAME:
+                # Too far behind (e.g. window dragged); drop the backlog
+                self.accumulator = 0.0
+                break
+            self.accumulator -= tick_length
+            self.tick()
+            ticks += 1
+            tick_length = self.tick_length()
+        
+        # Fraction of the next tick already elapsed, used to interpolate rendering
+        self.alpha = min(self.accumulator / tick_length, 1.0)
+        self.profiler.mark('update')
+        return True
+
+    def tick_length(self):
+        """Seconds per simulation tick at the current speed"""
+        return 1.0 / (self.speed * (self.playback_speed if self.playback else 1))
+
+    def tick(self):
+        """Advance the game by one simulation step"""
+        if self.playback:
+            self.replay_tick()
+            return
+        
+        # Turns must be recorded before the tick they apply to
+        if self.autopilot_enabled and self.state == 'PLAYING':
+            self.steer()
+        self.recorder.record_tick(self.state == 'PLAYING')
+        
+        # Update food animation
+        self.sim.update_food()
+        if self.state != 'MENU':
+            self.redraw = True
         
         # Update game logic
         if self.state == 'PLAYING':
             self.update_game()
-        
-        return True
+
+    def steer(self):
+        """Let the autopilot pick the next turn and feed it in like a key press"""
+        if self.autopilot is None or self.autopilot.grid_size != self.sim.grid_size:
+            self.autopilot = Autopilot(self.sim.grid_size)
+        direction = self.autopilot.choose(self.snake, self.food)
+        if self.snake.queue_direction(direction):
+            self.recorder.record_turn(direction)
+
+    def replay_tick(self):
+        """Advance a replay by one recorded tick; pausing freezes the replay"""
+        if self.state != 'PLAYING':
+            return
+        tick = self.playback.next_tick()
+        if tick is None:
+            self.game_over()
+            return
+        turns, moves = tick
+        for direction in turns:
+            self.snake.queue_direction(direction)
+        self.sim.update_food()
+        if moves:
+            self.update_game()
 
     def start_new_game(self):
         """Start a completely new game with current settings"""
+        self.autosave.discard()
         self.reset()
-        self.state = 'PLAYING'
+        self.record_game_start()
+        self.set_state('PLAYING')
 
     def update_game(self):
-        self.snake.move()
+        alive = self.sim.step()
+        if self.latency and self.snake.applied_input is not None:
+            self.latency.turn_applied(self.snake.applied_input)
         
-        # Check for self-collision
-        if self.snake.collides_with_self():
+        if not alive:
             self.game_over()
             return
-        
-        # Check for food collision
-        if self.snake.get_head() == self.food.position:
-            if self.food.is_special:
-                # Special food gives bonus points and growth
-                self.snake.grow()
-                self.snake.grow()
-                self.snake.grow()  # 3 extra segments
-                self.score += 5  # 5 points instead of 1
-            else:
-                # Normal food
-                self.snake.grow()
-                self.score += 1
-            
-            # Spawn new food
-            self.food.randomize_position(self.snake.body)
-            
-            # Check if we should spawn special food (only when no special food is active)
-            if not self.food.is_special:
-                # Check every 3 points instead of 5 for more frequent spawning
-                if self.score % 3 == 0:
-                    # Use the configured chance from settings
-                    if random.random() < self.special_food_chance:
-                        self.food.spawn_special_food(self.snake.body, self.special_food_duration)
-                        print(f"Special food spawned at score {self.score} with {self.special_food_chance*100:.1f}% chance")
-                    else:
-                        print(f"Special food check at score {self.score} - failed ({self.special_food_chance*100:.1f}% chance)")
-            
-            # Increase speed every 5 points (but respect settings)
-            if self.score % 5 == 0:
-                settings = self.menu.get_settings()
-                max_speed = settings['speed'] + 10  # Allow some speed increase
-                self.speed = min(self.speed + 2, max_speed)
+        if self.stream:
+            self.stream.publish(self.sim)
+        if self.sim.ticks % AUTOSAVE_INTERVAL == 0:
+            self.save_game()
 
     def game_over(self):
-        self.state = 'GAME_OVER'
+        self.set_state('GAME_OVER')
         self.menu.set_state('GAME_OVER')
+        if self.stream:
+            self.stream.publish(self.sim, game_over=True)
+        
+        # Replays neither count for the high score nor overwrite the last replay
+        if self.playback:
+            return
+        
+        self.replays.save(self.recorder.finish(self.score, self.sim.ticks))
+        self.autosave.discard()
         
-        if self.score > self.high_score:
-            save_high_score(self.score)
-            self.high_score = self.score
+        self.scores.add(self.score, self.sim.settings, self.sim.ticks)
+        self.high_score = self.scores.high_score()
 
     def restart_game(self):
         """Restart the current game with same settings"""
+        self.autosave.discard()
         self.reset()
-        self.state = 'PLAYING'
+        self.record_game_start()
+        self.set_state('PLAYING')
 
     def render_status_bar(self):
-        bar_height = 40
-        pygame.draw.rect(self.surface, BLUE, (0, WINDOW_SIZE, WINDOW_SIZE, bar_height))
+        pygame.draw.rect(self.surface, BLUE, self.status_bar_rect)
         
         # Score text
-        score_text = self.font.render(f'Score: {self.score}', True, WHITE)
+        score_text = render_text(self.font, f'Score: {self.score}', WHITE)
         self.surface.blit(score_text, (10, WINDOW_SIZE + 10))
         
         # High score text
-        high_score_text = self.font.render(f'High Score: {self.high_score}', True, WHITE)
+        high_score_text = render_text(self.font, f'High Score: {self.high_score}', WHITE)
         self.surface.blit(high_score_text, (200, WINDOW_SIZE + 10))
         
         # Special food indicator
         if self.food.is_special:
-            special_text = self.font.render(f'Special Food: {self.food.special_timer//10}s', True, GOLD)
+            special_text = render_text(self.font, f'Special Food: {self.food.special_timer//10}s', GOLD)
             self.surface.blit(special_text, (400, WINDOW_SIZE + 10))
         else:
             # Debug info for special food
             next_check = 3 - (self.score % 3)
             if next_check == 3:
                 next_check = 0
-            debug_text = self.font.render(f'Next check: {next_check} | Chance: {self.special_food_chance*100:.0f}%', True, WHITE)
+            debug_text = render_text(self.font, f'Next check: {next_check} | Chance: {self.special_food_chance*100:.0f}%', WHITE)
             self.surface.blit(debug_text, (400, WINDOW_SIZE + 10))
 
     def render_game(self):
-        # Draw background
-        self.surface.fill(BLACK)
-        
-        # Draw grid
-        draw_grid(self.surface)
-        
-        # Draw game objects
-        self.food.render(self.surface)
-        self.snake.render(self.surface)
+        # Grid and body in one blit, then food, head and tail interpolated
+        # between the last two ticks while playing
+        self.playfield.sync(self.snake, self.camera)
+        self.playfield.draw(self.surface, self.snake, self.food, self.camera,
+                            self.alpha, self.alpha if self.state == 'PLAYING' else 1.0)
         
         # Draw status bar
         self.render_status_bar()
 
+    def needs_render(self):
+        """Whether the screen is out of date; always while playing"""
+        return self.state == 'PLAYING' or self.redraw or self.menu.dirty
+
     def render(self):
+        self.redraw = False
+        self.camera.follow(self.snake.get_head())
+        
+        if self.state == 'PLAYING' and self.renderer:
+            self.present(self.renderer.render(self))
+            return
+        
         if self.state == 'PLAYING':
             self.render_game()
         elif self.state == 'MENU':
@@ -211,16 +450,66 @@ class Game:
             self.menu.render()
         elif self.state == 'GAME_OVER':
             self.render_game()  # Show game in background
-            self.menu.render(self.score, self.high_score)
+            self.menu.render(self.score, self.high_score, self.scores.top())
         
-        pygame.display.flip()
+        if self.renderer:
+            self.renderer.invalidate()
+        self.present()
+
+    def present(self, rects=None):
+        """Show the frame, either in full or only the given dirty rects"""
+        if self.profiler.show_overlay:
+            self.profiler.render_overlay(self.surface, self.status_bar_rect)
+            if rects is not None:
+                rects.append(self.status_bar_rect)
+        self.profiler.mark('render')
+        
+        if self.display:
+            self.display.present(rects)
+        elif rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.profiler.mark('present')
+        if self.capture:
+            self.capture.capture(self.surface)
+            self.profiler.mark('capture')
+        if self.latency:
+            self.latency.frame_presented()
+        if self.startup:
+            self.startup.mark('first frame')
+            print(self.startup.report())
+            self.startup = None
 
     def run(self):
-        running = True
-        while running:
-            self.clock.tick(self.speed)
+        # Events and rendering run at the display rate, game rules at self.speed
+        while True:
+            slept_in_menu = False
+            if self.state != 'PLAYING' and not self.needs_render():
+                self.wait_for_event()
+                slept_in_menu = self.state == 'MENU'
+            dt = self.clock.tick(RENDER_FPS) / 1000.0
+            if slept_in_menu:
+                # No game is shown in the main menu, so time asleep there is not
+                # simulated; a game started now begins like after a normal frame
+                dt = min(dt, 1.0 / RENDER_FPS)
+            self.profiler.begin_frame()
             if not self.handle_events():
                 break
-            if not self.update():
+            self.profiler.mark('events')
+            if not self.update(dt):
                 break
-            self.render() 
\ No newline at end of file
+            if self.needs_render():
+                self.render()
+            self.profiler.end_frame(self.tick_length())
+        
+        self.telemetry.record('quit', tick=self.sim.ticks, state=self.state)
+        # Quitting mid-game keeps it for next time, like a crash would
+        if self.state in ('PLAYING', 'PAUSED'):
+            self.save_game()
+        self.autosave.flush()
+        self.replays.close()
+        self.scores.close()
+        if self.latency:
+            print(self.latency.report())
+ 
\ No newline at end of file
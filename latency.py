@@ -0,0 +1,50 @@
+import time
+from collections import deque
+from utils import percentile
+
+# Number of recent latency samples kept for the report
+LATENCY_SAMPLES = 1000
+
+class LatencyTracer:
+    """Measures the time from a KEYDOWN event to the frame that shows the turn.
+
+    Key presses are stamped when they come out of pygame.event.get. The stamp
+    travels with the queued turn, is handed back when a move applies it and
+    is closed off by the next presented frame.
+    """
+
+    def __init__(self, max_samples=LATENCY_SAMPLES):
+        self.samples = deque(maxlen=max_samples)
+        self.pending = []
+        self.total = 0
+
+    def turn_applied(self, timestamp):
+        """A move used the turn pressed at timestamp"""
+        self.pending.append(timestamp)
+
+    def frame_presented(self):
+        """Close off every applied turn; it is visible from this frame on"""
+        if not self.pending:
+            return
+        now = time.perf_counter()
+        for timestamp in self.pending:
+            self.samples.append((now - timestamp) * 1000.0)
+        self.total += len(self.pending)
+        self.pending.clear()
+
+    def percentiles(self):
+        """Latency statistics in milliseconds over the recent samples"""
+        values = sorted(self.samples)
+        return {
+            'count': self.total,
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'p99': percentile(values, 0.99),
+            'max': values[-1] if values else 0.0,
+        }
+
+    def report(self):
+        stats = self.percentiles()
+        return (f"Input latency over {stats['count']} turns: "
+                f"p50 {stats['p50']:.1f} ms | p95 {stats['p95']:.1f} ms | "
+                f"p99 {stats['p99']:.1f} ms | max {stats['max']:.1f} ms")
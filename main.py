@@ -1,18 +1,142 @@
+import time
+STARTED = time.perf_counter()  # Before the imports, which are part of startup
+
+import argparse
+import sys
 import pygame
 from game import Game
-from utils import WINDOW_SIZE
+from arena import ArenaGame, ARENA_GRID_SIZE
+from replay import Replay, simulate
+from profiler import StartupTrace
+from stream import SpectatorServer, STREAM_PORT
+from telemetry import Telemetry, LEVELS
+from capture import FrameCapture, CAPTURE_FORMATS
+from display import Display, LOGICAL_SIZE
+from utils import GRID_SIZE
+
+def window_size(text):
+    """WIDTHxHEIGHT argument, e.g. 1920x1080"""
+    try:
+        width, height = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width < 1 or height < 1:
+        raise argparse.ArgumentTypeError(f"window size must be positive, got {text!r}")
+    return (width, height)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Snake Game - Enhanced Edition')
+    parser.add_argument('--window', type=window_size, default=LOGICAL_SIZE, metavar='WxH',
+                        help=f'initial window size; the game is scaled to fit and the window can be resized '
+                             f'(default {LOGICAL_SIZE[0]}x{LOGICAL_SIZE[1]})')
+    parser.add_argument('--fullscreen', action='store_true',
+                        help='start fullscreen at the desktop resolution (F11 toggles it)')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='only redraw changed areas during gameplay (saves CPU on slow machines)')
+    parser.add_argument('--grid-size', type=int, metavar='CELLS',
+                        help=f'board width and height in cells; larger boards scroll with the snake '
+                             f'(default {GRID_SIZE}, {ARENA_GRID_SIZE} in the arena)')
+    parser.add_argument('--arena', type=int, metavar='BOTS',
+                        help='play in a shared arena against BOTS computer snakes')
+    parser.add_argument('--players', type=int, choices=(1, 2), default=1,
+                        help='local players in the arena: arrow keys, then WASD')
+    parser.add_argument('--autopilot', action='store_true',
+                        help='let the computer steer the snake (F2 toggles it in game)')
+    parser.add_argument('--stream', nargs='?', type=int, const=STREAM_PORT, metavar='PORT',
+                        help=f'broadcast the game to spectate.py viewers on localhost (default port {STREAM_PORT})')
+    parser.add_argument('--telemetry-level', choices=[*LEVELS, 'off'], default='info',
+                        help='lowest level of game events written to telemetry.jsonl (default info)')
+    parser.add_argument('--capture', metavar='DIR',
+                        help='save the shown frames to DIR in the background')
+    parser.add_argument('--capture-format', choices=CAPTURE_FORMATS, default='png',
+                        help='PNG files or raw pixels described by DIR/capture.json (default png)')
+    parser.add_argument('--capture-every', type=int, default=1, metavar='N',
+                        help='keep every Nth shown frame')
+    parser.add_argument('--capture-scale', type=float, default=1.0, metavar='F',
+                        help='downscale saved frames by this factor, e.g. 0.5')
+    parser.add_argument('--trace-latency', action='store_true',
+                        help='measure key press to screen latency and print percentiles on exit')
+    parser.add_argument('--profile', nargs='?', const='frame_profile.json', metavar='FILE',
+                        help='time every frame phase (F3 shows the numbers) and write them to FILE on exit')
+    parser.add_argument('--trace-startup', action='store_true',
+                        help='print how long each startup phase took until the first frame')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='play back a recorded game')
+    parser.add_argument('--replay-speed', type=float, default=1.0, metavar='N',
+                        help='play the replay at N times its original speed')
+    parser.add_argument('--headless', action='store_true',
+                        help='with --replay, re-simulate without a window and check the result')
+    return parser.parse_args()
+
+def check_replay(path):
+    """Re-simulate a replay headless and compare it with the recorded outcome"""
+    replay = Replay.load(path)
+    sim = simulate(replay)
+    death_tick = None if sim.alive else sim.ticks
+    print(f"Replayed score {sim.score}, ended on tick {death_tick}")
+    print(f"Recorded score {replay.score}, ended on tick {replay.death_tick}")
+    matches = sim.score == replay.score and death_tick == replay.death_tick
+    print("Replay verified" if matches else "Replay MISMATCH")
+    return 0 if matches else 1
 
 def main():
+    args = parse_args()
+    if args.replay and args.headless:
+        return check_replay(args.replay)
+    
+    startup = None
+    if args.trace_startup:
+        startup = StartupTrace(STARTED)
+        startup.mark('imports')
+    
     pygame.init()
+    if startup:
+        startup.mark('pygame.init')
     
-    window_height = WINDOW_SIZE + 40  # Extra space for status bar
-    surface = pygame.display.set_mode((WINDOW_SIZE, window_height))
+    # Everything is drawn at the logical size and scaled to the window once per frame
+    display = Display(args.window, args.fullscreen)
+    surface = display.canvas
     pygame.display.set_caption('Snake Game - Enhanced Edition')
+    if startup:
+        startup.mark('window')
+    
+    if args.arena is not None:
+        ArenaGame(surface, args.arena, args.players, args.grid_size or ARENA_GRID_SIZE, display=display).run()
+        pygame.quit()
+        return 0
+    
+    stream = None
+    if args.stream is not None:
+        stream = SpectatorServer(port=args.stream)
+        print(f"Streaming to spectators on port {stream.start()}")
+    
+    telemetry = None
+    if args.telemetry_level != 'off':
+        telemetry = Telemetry(level=LEVELS[args.telemetry_level])
+    
+    capture = None
+    if args.capture:
+        capture = FrameCapture(args.capture, args.capture_format, args.capture_every, args.capture_scale)
     
-    game = Game(surface)
+    game = Game(surface, dirty_rects=args.dirty_rects, trace_latency=args.trace_latency,
+                profile=args.profile is not None, grid_size=args.grid_size or GRID_SIZE,
+                autopilot=args.autopilot, startup=startup, stream=stream, telemetry=telemetry,
+                capture=capture, display=display)
+    if args.replay:
+        game.start_replay(Replay.load(args.replay), args.replay_speed)
     game.run()
+    if args.profile:
+        game.profiler.export(args.profile)
+    if stream:
+        stream.stop()
+    if telemetry:
+        telemetry.close()
+    if capture:
+        capture.close()
+        print(f"Captured {len(capture.written)} frames to {args.capture}, dropped {capture.dropped}")
     
     pygame.quit()
+    return 0
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -1,27 +1,97 @@
 import pygame
-from utils import WINDOW_SIZE, WHITE, BLACK, BLUE, GRAY, GREEN, RED
+import time
+from utils import WINDOW_SIZE, WHITE, BLACK, BLUE, GRAY, GREEN, RED, render_text, get_font
+
+# Static text per screen: font attribute, text, color and center position
+MENU_TEXT = {
+    'MAIN': [
+        ('title_font', "SNAKE GAME", WHITE, (WINDOW_SIZE//2, 100)),
+        ('subtitle_font', "Use arrow keys to move", GRAY, (WINDOW_SIZE//2, 160)),
+        ('subtitle_font', "Click buttons or use keyboard shortcuts", WHITE, (WINDOW_SIZE//2, 450)),
+    ],
+    'PAUSE': [
+        ('title_font', "PAUSED", WHITE, (WINDOW_SIZE//2, 100)),
+        ('subtitle_font', "Press ESC to resume or click buttons", WHITE, (WINDOW_SIZE//2, 150)),
+    ],
+    'GAME_OVER': [
+        ('title_font', "GAME OVER", WHITE, (WINDOW_SIZE//2, 80)),
+        ('subtitle_font', "Press SPACE to restart or click buttons", WHITE, (WINDOW_SIZE//2, 400)),
+    ],
+    'SETTINGS': [
+        ('title_font', "SETTINGS", WHITE, (WINDOW_SIZE//2, 80)),
+        ('subtitle_font', "Drag sliders to adjust game settings", GRAY, (WINDOW_SIZE//2, 120)),
+    ],
+}
+
+# Button layout per screen: name, top edge, label and (color, hover color)
+BUTTON_WIDTH = 200
+BUTTON_HEIGHT = 50
+BUTTON_SPACING = 70
+GREEN_BUTTON = ((100, 200, 100), (150, 255, 150))
+BLUE_BUTTON = ((100, 100, 200), (150, 150, 255))
+RED_BUTTON = ((200, 100, 100), (255, 150, 150))
+BUTTONS = {
+    'MAIN': [
+        ('play', 250, "PLAY GAME", GREEN_BUTTON),
+        ('settings', 250 + BUTTON_SPACING, "SETTINGS", BLUE_BUTTON),
+        ('quit', 250 + BUTTON_SPACING * 2, "QUIT", RED_BUTTON),
+    ],
+    'PAUSE': [
+        ('resume', 200, "RESUME", GREEN_BUTTON),
+        ('menu', 200 + BUTTON_SPACING, "MAIN MENU", BLUE_BUTTON),
+    ],
+    'GAME_OVER': [
+        ('restart', 270, "RESTART", GREEN_BUTTON),
+        ('menu', 270 + BUTTON_SPACING, "MAIN MENU", BLUE_BUTTON),
+    ],
+    'SETTINGS': [
+        ('back', 450, "BACK", RED_BUTTON),
+    ],
+}
+
+# Settings sliders: setting name, top edge, range, initial value and label
+SLIDERS = [
+    ('speed', 200, 5, 20, 10, "Game Speed"),
+    ('special_food_chance', 280, 5, 25, 10, "Special Food Chance (%)"),
+    ('special_food_duration', 360, 15, 60, 30, "Special Food Duration (s)"),
+]
 
 class Button:
     def __init__(self, x, y, width, height, text, font_size=24, color=BLUE, hover_color=GREEN):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
-        self.font = pygame.font.SysFont('consolas', font_size)
+        self.font = get_font(font_size)
         self.color = color
         self.hover_color = hover_color
         self.is_hovered = False
+        self.surfaces = {}  # Pre-rendered button images keyed by hover state
         
     def update(self, mouse_pos):
-        self.is_hovered = self.rect.collidepoint(mouse_pos)
+        """Hit-test the mouse; returns True when the hover state changed"""
+        hovered = bool(self.rect.collidepoint(mouse_pos))
+        changed = hovered != self.is_hovered
+        self.is_hovered = hovered
+        return changed
         
     def render(self, surface):
-        color = self.hover_color if self.is_hovered else self.color
-        pygame.draw.rect(surface, color, self.rect)
-        pygame.draw.rect(surface, WHITE, self.rect, 2)
+        image = self.surfaces.get(self.is_hovered)
+        if image is None:
+            image = self.surfaces[self.is_hovered] = self.build_surface(self.is_hovered)
+        surface.blit(image, self.rect)
+    
+    def build_surface(self, hovered):
+        """Draw the button once into its own surface"""
+        image = pygame.Surface(self.rect.size)
+        rect = image.get_rect()
+        color = self.hover_color if hovered else self.color
+        pygame.draw.rect(image, color, rect)
+        pygame.draw.rect(image, WHITE, rect, 2)
         
         # Draw text
-        text_surface = self.font.render(self.text, True, WHITE)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        surface.blit(text_surface, text_rect)
+        text_surface = render_text(self.font, self.text, WHITE)
+        text_rect = text_surface.get_rect(center=rect.center)
+        image.blit(text_surface, text_rect)
+        return image
         
     def is_clicked(self, mouse_pos, mouse_clicked):
         return self.rect.collidepoint(mouse_pos) and mouse_clicked
@@ -33,11 +103,15 @@ class Slider:
         self.max_val = max_val
         self.value = initial_val
         self.text = text
-        self.font = pygame.font.SysFont('consolas', 20)
+        self.font = get_font(20)
         self.is_dragging = False
         self.is_hovered = False
+        self.bar = None  # Cached bar image, rebuilt when the fill width changes
+        self.bar_fill = None
         
     def update(self, mouse_pos, mouse_clicked, mouse_down):
+        """Hit-test and drag; returns True when the value changed"""
+        value = self.value
         self.is_hovered = self.rect.collidepoint(mouse_pos)
         
         if mouse_clicked and self.is_hovered:
@@ -51,103 +125,122 @@ class Slider:
             rel_x = mouse_pos[0] - self.rect.x
             self.value = self.min_val + (rel_x / self.rect.width) * (self.max_val - self.min_val)
             self.value = max(self.min_val, min(self.max_val, self.value))
+        return self.value != value
     
     def render(self, surface):
-        # Draw background
-        pygame.draw.rect(surface, GRAY, self.rect)
-        pygame.draw.rect(surface, WHITE, self.rect, 2)
-        
-        # Draw fill
-        fill_width = (self.value - self.min_val) / (self.max_val - self.min_val) * self.rect.width
-        fill_rect = pygame.Rect(self.rect.x, self.rect.y, fill_width, self.rect.height)
-        pygame.draw.rect(surface, GREEN, fill_rect)
+        fill_width = int((self.value - self.min_val) / (self.max_val - self.min_val) * self.rect.width)
+        if fill_width != self.bar_fill:
+            self.bar = self.build_bar(fill_width)
+            self.bar_fill = fill_width
+        surface.blit(self.bar, self.rect)
         
         # Draw text
-        text_surface = self.font.render(f"{self.text}: {int(self.value)}", True, WHITE)
+        text_surface = render_text(self.font, f"{self.text}: {int(self.value)}", WHITE)
         text_rect = text_surface.get_rect(midleft=(self.rect.x, self.rect.y - 25))
         surface.blit(text_surface, text_rect)
 
+    def build_bar(self, fill_width):
+        """Draw the slider bar with the given fill width"""
+        bar = pygame.Surface(self.rect.size)
+        rect = bar.get_rect()
+        
+        # Draw background
+        pygame.draw.rect(bar, GRAY, rect)
+        pygame.draw.rect(bar, WHITE, rect, 2)
+        
+        # Draw fill
+        pygame.draw.rect(bar, GREEN, pygame.Rect(0, 0, fill_width, rect.height))
+        return bar
+
 class Menu:
     def __init__(self, surface):
         self.surface = surface
-        self.title_font = pygame.font.SysFont('consolas', 48, bold=True)
-        self.subtitle_font = pygame.font.SysFont('consolas', 24)
-        
-        # Calculate button positions
-        center_x = WINDOW_SIZE // 2
-        button_width = 200
-        button_height = 50
-        button_spacing = 70
-        
-        # Create buttons for main menu with new color scheme
-        self.main_buttons = {
-            'play': Button(center_x - button_width//2, 250, button_width, button_height, "PLAY GAME", color=(100, 200, 100), hover_color=(150, 255, 150)),
-            'settings': Button(center_x - button_width//2, 250 + button_spacing, button_width, button_height, "SETTINGS", color=(100, 100, 200), hover_color=(150, 150, 255)),
-            'quit': Button(center_x - button_width//2, 250 + button_spacing * 2, button_width, button_height, "QUIT", color=(200, 100, 100), hover_color=(255, 150, 150))
-        }
-        
-        # Create buttons for pause menu with consistent color scheme
-        self.pause_buttons = {
-            'resume': Button(center_x - button_width//2, 200, button_width, button_height, "RESUME", color=(100, 200, 100), hover_color=(150, 255, 150)),
-            'menu': Button(center_x - button_width//2, 200 + button_spacing, button_width, button_height, "MAIN MENU", color=(100, 100, 200), hover_color=(150, 150, 255))
-        }
+        self.title_font = get_font(48, bold=True)
+        self.subtitle_font = get_font(24)
+        self.small_font = get_font(18)
         
-        # Create buttons for game over menu with consistent color scheme
-        self.game_over_buttons = {
-            'restart': Button(center_x - button_width//2, 270, button_width, button_height, "RESTART", color=(100, 200, 100), hover_color=(150, 255, 150)),
-            'menu': Button(center_x - button_width//2, 270 + button_spacing, button_width, button_height, "MAIN MENU", color=(100, 100, 200), hover_color=(150, 150, 255))
-        }
+        # Buttons and sliders of each screen, built the first time it is shown
+        self.buttons = {}
+        self.slider_widgets = None
+        self.settings = {name: initial for name, _, _, _, initial, _ in SLIDERS}
         
-        # Create buttons for settings menu
-        self.settings_buttons = {
-            'back': Button(center_x - button_width//2, 450, button_width, button_height, "BACK", color=(200, 100, 100), hover_color=(255, 150, 150))
-        }
-        
-        # Create sliders for settings
-        slider_x = center_x - 100
-        self.sliders = {
-            'speed': Slider(slider_x, 200, 200, 20, 5, 20, 10, "Game Speed"),
-            'special_food_chance': Slider(slider_x, 280, 200, 20, 5, 25, 10, "Special Food Chance (%)"),
-            'special_food_duration': Slider(slider_x, 360, 200, 20, 15, 60, 30, "Special Food Duration (s)")
-        }
+        # Static parts of each menu screen, built on first use
+        self.overlay = None
+        self.text_layers = {}
         
         self.current_state = 'MAIN'
         self.mouse_pos = (0, 0)
         self.mouse_clicked = False
         self.mouse_down = False
-        
+        # Set when the menu looks different from what was last rendered
+        self.dirty = True
+        
+    def get_buttons(self, state):
+        """Buttons of a screen, created on first use"""
+        buttons = self.buttons.get(state)
+        if buttons is None:
+            x = WINDOW_SIZE // 2 - BUTTON_WIDTH // 2
+            buttons = self.buttons[state] = {
+                name: Button(x, y, BUTTON_WIDTH, BUTTON_HEIGHT, text, color=color, hover_color=hover_color)
+                for name, y, text, (color, hover_color) in BUTTONS[state]
+            }
+        return buttons
+    
+    @property
+    def main_buttons(self):
+        return self.get_buttons('MAIN')
+    
+    @property
+    def pause_buttons(self):
+        return self.get_buttons('PAUSE')
+    
+    @property
+    def game_over_buttons(self):
+        return self.get_buttons('GAME_OVER')
+    
+    @property
+    def settings_buttons(self):
+        return self.get_buttons('SETTINGS')
+    
+    @property
+    def sliders(self):
+        """Settings sliders, created the first time the settings screen needs them"""
+        if self.slider_widgets is None:
+            x = WINDOW_SIZE // 2 - 100
+            self.slider_widgets = {
+                name: Slider(x, y, 200, 20, min_val, max_val, self.settings[name], text)
+                for name, y, min_val, max_val, _, text in SLIDERS
+            }
+        return self.slider_widgets
+    
     def update(self, mouse_pos, mouse_clicked, mouse_down=False):
-        """Update menu state and handle interactions"""
+        """Handle a mouse event: hit-test the current screen and return the action to take"""
         self.mouse_pos = mouse_pos
         self.mouse_clicked = mouse_clicked
         self.mouse_down = mouse_down
         
-        # Update all buttons based on current state
-        if self.current_state == 'MAIN':
-            for button in self.main_buttons.values():
-                button.update(mouse_pos)
-        elif self.current_state == 'PAUSE':
-            for button in self.pause_buttons.values():
-                button.update(mouse_pos)
-        elif self.current_state == 'GAME_OVER':
-            for button in self.game_over_buttons.values():
-                button.update(mouse_pos)
-        elif self.current_state == 'SETTINGS':
-            for button in self.settings_buttons.values():
-                button.update(mouse_pos)
+        self.hit_test()
+        if self.current_state == 'SETTINGS':
             for slider in self.sliders.values():
-                slider.update(mouse_pos, mouse_clicked, mouse_down)
+                if slider.update(mouse_pos, mouse_clicked, mouse_down):
+                    self.dirty = True
         
         # Handle button clicks
         return self.handle_clicks()
     
+    def hit_test(self):
+        """Update the hover state of the current screen's buttons"""
+        for button in self.get_buttons(self.current_state).values():
+            if button.update(self.mouse_pos):
+                self.dirty = True
+    
     def handle_clicks(self):
         """Handle button clicks and return the action to take"""
         if self.current_state == 'MAIN':
             if self.main_buttons['play'].is_clicked(self.mouse_pos, self.mouse_clicked):
                 return 'PLAY'
             elif self.main_buttons['settings'].is_clicked(self.mouse_pos, self.mouse_clicked):
-                self.current_state = 'SETTINGS'
+                self.set_state('SETTINGS')
                 return None
             elif self.main_buttons['quit'].is_clicked(self.mouse_pos, self.mouse_clicked):
                 return 'QUIT'
@@ -156,111 +249,101 @@ class Menu:
             if self.pause_buttons['resume'].is_clicked(self.mouse_pos, self.mouse_clicked):
                 return 'RESUME'
             elif self.pause_buttons['menu'].is_clicked(self.mouse_pos, self.mouse_clicked):
-                self.current_state = 'MAIN'
+                self.set_state('MAIN')
                 return 'MENU'
                 
         elif self.current_state == 'GAME_OVER':
             if self.game_over_buttons['restart'].is_clicked(self.mouse_pos, self.mouse_clicked):
                 return 'RESTART'
             elif self.game_over_buttons['menu'].is_clicked(self.mouse_pos, self.mouse_clicked):
-                self.current_state = 'MAIN'
+                self.set_state('MAIN')
                 return 'MENU'
                 
         elif self.current_state == 'SETTINGS':
             if self.settings_buttons['back'].is_clicked(self.mouse_pos, self.mouse_clicked):
-                self.current_state = 'MAIN'
+                self.set_state('MAIN')
                 return None
         
         return None
     
     def get_settings(self):
         """Get current settings values"""
-        return {
-            'speed': int(self.sliders['speed'].value),
-            'special_food_chance': int(self.sliders['special_food_chance'].value),
-            'special_food_duration': int(self.sliders['special_food_duration'].value)
-        }
+        if self.slider_widgets is not None:
+            for name, slider in self.slider_widgets.items():
+                self.settings[name] = int(slider.value)
+        return dict(self.settings)
     
     def set_state(self, state):
         """Set the current menu state"""
         self.current_state = state
+        self.dirty = True
+        # The mouse may already be over a button of the new screen
+        self.hit_test()
     
-    def render(self, score=0, high_score=0):
+    def render(self, score=0, high_score=0, leaderboard=()):
         """Render the menu based on current state"""
+        self.dirty = False
         if self.current_state == 'MAIN':
             self.render_main_menu()
         elif self.current_state == 'PAUSE':
             self.render_pause_menu()
         elif self.current_state == 'GAME_OVER':
-            self.render_game_over_menu(score, high_score)
+            self.render_game_over_menu(score, high_score, leaderboard)
         elif self.current_state == 'SETTINGS':
             self.render_settings_menu()
     
+    def get_overlay(self):
+        """Semi-transparent overlay shown over the paused or finished game"""
+        if self.overlay is None:
+            self.overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+            self.overlay.set_alpha(128)
+            self.overlay.fill(BLACK)
+        return self.overlay
+    
+    def get_text_layer(self, state):
+        """Transparent layer holding the static titles and instructions of a screen"""
+        layer = self.text_layers.get(state)
+        if layer is None:
+            layer = pygame.Surface(self.surface.get_size(), pygame.SRCALPHA)
+            for font, text, color, center in MENU_TEXT[state]:
+                text_surface = render_text(getattr(self, font), text, color)
+                layer.blit(text_surface, text_surface.get_rect(center=center))
+            self.text_layers[state] = layer
+        return layer
+    
     def render_main_menu(self):
         """Render the main menu"""
         # Background
         self.surface.fill(BLACK)
         
-        # Title
-        title_text = self.title_font.render("SNAKE GAME", True, WHITE)
-        title_rect = title_text.get_rect(center=(WINDOW_SIZE//2, 100))
-        self.surface.blit(title_text, title_rect)
-        
-        # Subtitle
-        subtitle_text = self.subtitle_font.render("Use arrow keys to move", True, GRAY)
-        subtitle_rect = subtitle_text.get_rect(center=(WINDOW_SIZE//2, 160))
-        self.surface.blit(subtitle_text, subtitle_rect)
-        
         # Render buttons
         for button in self.main_buttons.values():
             button.render(self.surface)
         
-        # Instructions
-        instr_text = self.subtitle_font.render("Click buttons or use keyboard shortcuts", True, WHITE)
-        instr_rect = instr_text.get_rect(center=(WINDOW_SIZE//2, 450))
-        self.surface.blit(instr_text, instr_rect)
+        # Title, subtitle and instructions
+        self.surface.blit(self.get_text_layer('MAIN'), (0, 0))
     
     def render_pause_menu(self):
         """Render the pause menu"""
-        # Semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.surface.blit(overlay, (0, 0))
-        
-        # Pause text
-        pause_text = self.title_font.render("PAUSED", True, WHITE)
-        pause_rect = pause_text.get_rect(center=(WINDOW_SIZE//2, 100))
-        self.surface.blit(pause_text, pause_rect)
-        
-        # Instructions
-        instr_text = self.subtitle_font.render("Press ESC to resume or click buttons", True, WHITE)
-        instr_rect = instr_text.get_rect(center=(WINDOW_SIZE//2, 150))
-        self.surface.blit(instr_text, instr_rect)
+        self.surface.blit(self.get_overlay(), (0, 0))
         
         # Render buttons
         for button in self.pause_buttons.values():
             button.render(self.surface)
+        
+        # Pause text and instructions
+        self.surface.blit(self.get_text_layer('PAUSE'), (0, 0))
     
-    def render_game_over_menu(self, score, high_score):
+    def render_game_over_menu(self, score, high_score, leaderboard=()):
         """Render the game over menu"""
-        # Semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.surface.blit(overlay, (0, 0))
-        
-        # Game over text
-        over_text = self.title_font.render("GAME OVER", True, WHITE)
-        over_rect = over_text.get_rect(center=(WINDOW_SIZE//2, 80))
-        self.surface.blit(over_text, over_rect)
+        self.surface.blit(self.get_overlay(), (0, 0))
         
         # Score display
-        score_text = self.subtitle_font.render(f"Score: {score}", True, WHITE)
+        score_text = render_text(self.subtitle_font, f"Score: {score}", WHITE)
         score_rect = score_text.get_rect(center=(WINDOW_SIZE//2, 130))
         self.surface.blit(score_text, score_rect)
         
-        high_score_text = self.subtitle_font.render(f"High Score: {high_score}", True, WHITE)
+        high_score_text = render_text(self.subtitle_font, f"High Score: {high_score}", WHITE)
         high_score_rect = high_score_text.get_rect(center=(WINDOW_SIZE//2, 160))
         self.surface.blit(high_score_text, high_score_rect)
         
@@ -268,30 +351,29 @@ class Menu:
         for button in self.game_over_buttons.values():
             button.render(self.surface)
         
-        # Instructions
-        instr_text = self.subtitle_font.render("Press SPACE to restart or click buttons", True, WHITE)
-        instr_rect = instr_text.get_rect(center=(WINDOW_SIZE//2, 400))
-        self.surface.blit(instr_text, instr_rect)
+        # Best games so far, from the score store's entries
+        for i, entry in enumerate(leaderboard):
+            line = f"{i + 1}. {entry['score']:>5}"
+            if entry['timestamp']:
+                line += time.strftime('   %Y-%m-%d %H:%M', time.localtime(entry['timestamp']))
+            text = render_text(self.small_font, line, WHITE)
+            self.surface.blit(text, text.get_rect(midleft=(WINDOW_SIZE//2 - 130, 450 + i * 24)))
+        
+        # Game over text and instructions
+        self.surface.blit(self.get_text_layer('GAME_OVER'), (0, 0))
     
     def render_settings_menu(self):
         """Render the settings menu"""
         # Background
         self.surface.fill(BLACK)
         
-        # Title
-        title_text = self.title_font.render("SETTINGS", True, WHITE)
-        title_rect = title_text.get_rect(center=(WINDOW_SIZE//2, 80))
-        self.surface.blit(title_text, title_rect)
-        
-        # Instructions
-        instr_text = self.subtitle_font.render("Drag sliders to adjust game settings", True, GRAY)
-        instr_rect = instr_text.get_rect(center=(WINDOW_SIZE//2, 120))
-        self.surface.blit(instr_text, instr_rect)
-        
         # Render sliders
         for slider in self.sliders.values():
             slider.render(self.surface)
         
         # Render back button
         for button in self.settings_buttons.values():
-            button.render(self.surface) 
\ No newline at end of file
+            button.render(self.surface)
+        
+        # Title and instructions
+        self.surface.blit(self.get_text_layer('SETTINGS'), (0, 0))
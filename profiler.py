@@ -0,0 +1,141 @@
+import json
+import time
+import pygame
+from collections import deque
+from utils import WHITE, BLACK, percentile, render_text, get_font
+
+# Frame phases in the order Game.run goes through them
+PHASES = ('events', 'menu', 'update', 'render', 'present', 'capture')
+
+# Number of recent frames kept for percentiles
+PROFILE_HISTORY = 600
+
+# Frames between refreshes of the on-screen numbers
+OVERLAY_REFRESH = 30
+
+
+class FrameProfiler:
+    """Times each phase of every frame and keeps rolling statistics.
+
+    Game.run calls begin_frame after the clock wait, mark(phase) at the end
+    of each phase and end_frame with the tick deadline. A frame whose work
+    took longer than the deadline counts as missed.
+    """
+
+    def __init__(self, history=PROFILE_HISTORY):
+        self.samples = {name: deque(maxlen=history) for name in PHASES + ('frame',)}
+        self.worst = dict.fromkeys(PHASES + ('frame',), 0.0)
+        self.frames = 0
+        self.missed = 0
+        self.show_overlay = False
+        self.overlay_text = ''
+        self.font = None
+        self.frame_start = self.last = time.perf_counter()
+        self.current = dict.fromkeys(PHASES, 0.0)
+
+    def begin_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        for name in PHASES:
+            self.current[name] = 0.0
+
+    def mark(self, phase):
+        """End the given phase; time since the previous mark is charged to it"""
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self, deadline):
+        total = self.last - self.frame_start
+        for name in PHASES:
+            self.record(name, self.current[name])
+        self.record('frame', total)
+        self.frames += 1
+        if total > deadline:
+            self.missed += 1
+        if self.show_overlay and self.frames % OVERLAY_REFRESH == 0:
+            self.overlay_text = self.summary_line()
+
+    def record(self, name, seconds):
+        ms = seconds * 1000.0
+        self.samples[name].append(ms)
+        if ms > self.worst[name]:
+            self.worst[name] = ms
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        self.overlay_text = self.summary_line()
+
+    def stats(self):
+        """Per-phase p50/p95/p99 over recent frames and the worst frame seen, in ms"""
+        result = {}
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            result[name] = {
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+                'worst': self.worst[name],
+            }
+        return result
+
+    def summary_line(self):
+        stats = self.stats()
+        phases = ' '.join(f"{name} {stats[name]['p95']:.1f}" for name in PHASES)
+        return (f"p95 ms: {phases} | frame {stats['frame']['p95']:.1f} "
+                f"worst {stats['frame']['worst']:.1f} | missed {self.missed}/{self.frames}")
+
+    def render_overlay(self, surface, rect):
+        """Draw the numbers over the status bar area"""
+        if self.font is None:
+            self.font = get_font(14)
+        pygame.draw.rect(surface, BLACK, rect)
+        text = render_text(self.font, self.overlay_text, WHITE)
+        surface.blit(text, text.get_rect(midleft=(rect.x + 5, rect.centery)))
+
+    def export(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'frames': self.frames,
+                'missed_deadlines': self.missed,
+                'phases': self.stats(),
+            }, f, indent=2)
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every call is a no-op"""
+
+    show_overlay = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self, deadline):
+        pass
+
+    def toggle_overlay(self):
+        pass
+
+
+class StartupTrace:
+    """Wall time of each startup phase, from process start to the first frame.
+
+    main() marks the end of each phase; Game marks its own construction
+    steps and the first presented frame, which prints the report.
+    """
+
+    def __init__(self, start=None):
+        self.start = self.last = start if start is not None else time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f"  {name:14s} {seconds * 1000.0:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"  {'first frame at':14s} {(self.last - self.start) * 1000.0:8.1f} ms")
+        return "Startup:\n" + "\n".join(lines)
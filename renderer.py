@@ -0,0 +1,159 @@
+import pygame
+from itertools import islice
+from utils import WINDOW_SIZE, CELL_SIZE, BLACK, draw_grid
+
+# More moves than this between two frames triggers a full redraw
+MAX_INCREMENTAL_MOVES = 8
+
+PLAYFIELD_RECT = pygame.Rect(0, 0, WINDOW_SIZE, WINDOW_SIZE)
+
+
+def cell_rect(position):
+    x, y = position
+    return pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+
+def occupied_cells(snake, camera, area):
+    """Screen cells overlapping a screen rect that hold a body segment behind the head"""
+    left, top = area.left // CELL_SIZE, area.top // CELL_SIZE
+    right = min((area.right - 1) // CELL_SIZE, camera.view - 1)
+    bottom = min((area.bottom - 1) // CELL_SIZE, camera.view - 1)
+    for y in range(top, bottom + 1):
+        for x in range(left, right + 1):
+            if snake.body_segments_at(camera.to_board((x, y))) > 0:
+                yield (x, y)
+
+
+def draw_food(surface, snake, food, camera, alpha=0.0):
+    """Draw the food under the snake; returns the screen area it covers"""
+    food.render(surface, alpha, camera)
+    bounds = food.get_bounds(camera, alpha).clip(PLAYFIELD_RECT)
+    # The snake is drawn over the food, so repaint the body segments it overlaps
+    for position in occupied_cells(snake, camera, bounds):
+        snake.render_segment(surface, position)
+    return bounds
+
+
+class Playfield:
+    """Persistent picture of the grid and the snake body behind the head.
+
+    The surface is kept up to date incrementally: each move repaints the old
+    head cell as body and erases the vacated tail cell. It is only redrawn in
+    full for a new snake, when the camera scrolls, or when too many moves
+    happened since the last sync. Drawing the board is then one blit plus the
+    food, head and tail, regardless of the snake length.
+    """
+
+    def __init__(self):
+        self.background = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+        self.background.fill(BLACK)
+        draw_grid(self.background)
+        self.surface = self.background.copy()
+        self.invalidate()
+
+    def invalidate(self):
+        """Force the next sync to redraw everything"""
+        self.snake = None
+        self.camera_offset = None
+        self.moves = 0
+        self.pops = 0
+
+    def sync(self, snake, camera):
+        """Bring the surface up to date; returns the changed screen rects, or None after a full redraw"""
+        new_moves = snake.moves - self.moves
+        new_pops = snake.pops - self.pops
+        if (snake is not self.snake or camera.offset != self.camera_offset
+                or new_moves > MAX_INCREMENTAL_MOVES or new_pops > len(snake.vacated)):
+            self.redraw(snake, camera)
+            return None
+
+        changed = []
+        for position in islice(reversed(snake.vacated), new_pops):
+            self.refresh_cell(snake, camera, position, changed)
+        if new_moves:
+            # New heads, and the previous head which is now body
+            for position in islice(snake.body, new_moves + 1):
+                self.refresh_cell(snake, camera, position, changed)
+        self.remember(snake, camera)
+        return changed
+
+    def redraw(self, snake, camera):
+        self.surface.blit(self.background, (0, 0))
+        for position in snake.visible_body(camera):
+            snake.render_segment(self.surface, position)
+        self.remember(snake, camera)
+
+    def refresh_cell(self, snake, camera, position, changed):
+        screen_position = camera.to_screen(position)
+        if screen_position is None:
+            return
+        rect = cell_rect(screen_position)
+        self.surface.blit(self.background, rect, rect)
+        if snake.body_segments_at(position) > 0:
+            snake.render_segment(self.surface, screen_position)
+        changed.append(rect)
+
+    def remember(self, snake, camera):
+        self.snake = snake
+        self.camera_offset = camera.offset
+        self.moves = snake.moves
+        self.pops = snake.pops
+
+    def draw(self, surface, snake, food, camera, food_alpha=0.0, snake_alpha=1.0):
+        """Draw the whole board; returns the screen area covered by the food"""
+        surface.blit(self.surface, (0, 0))
+        food_rect = draw_food(surface, snake, food, camera, food_alpha)
+        snake.render_head(surface, snake_alpha, camera)
+        return food_rect
+
+
+class DirtyRectRenderer:
+    """Renders gameplay by repainting only the areas that changed.
+
+    Cells changed in the playfield since the last frame, the old and new food
+    areas and the head are copied from the playfield, the food and head are
+    drawn on top, and the list of touched rects is returned for
+    pygame.display.update.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.invalidate()
+
+    def invalidate(self):
+        """Force the next frame to be drawn in full"""
+        self.snake = None
+        self.food_rect = None
+        self.head_rect = None
+
+    def render(self, game):
+        """Draw the playing screen; returns dirty rects, or None after a full redraw"""
+        snake, food, camera, playfield = game.snake, game.food, game.camera, game.playfield
+        changed = playfield.sync(snake, camera)
+        if changed is None or snake is not self.snake:
+            self.food_rect = playfield.draw(self.surface, snake, food, camera)
+            self.head_rect = self.get_head_rect(snake, camera)
+            self.snake = snake
+            game.render_status_bar()
+            return None
+
+        areas = changed
+        areas.append(self.food_rect)
+        areas.append(self.head_rect)
+        for area in areas:
+            self.surface.blit(playfield.surface, area, area)
+
+        self.food_rect = draw_food(self.surface, snake, food, camera)
+        snake.render_head(self.surface, 1.0, camera)
+        self.head_rect = self.get_head_rect(snake, camera)
+        areas.append(self.food_rect)
+        areas.append(self.head_rect)
+
+        game.render_status_bar()
+        areas.append(game.status_bar_rect)
+        return areas
+
+    @staticmethod
+    def get_head_rect(snake, camera):
+        screen_position = camera.to_screen(snake.get_head())
+        return cell_rect(screen_position) if screen_position else pygame.Rect(0, 0, 0, 0)
@@ -0,0 +1,255 @@
+import os
+import queue
+import struct
+import threading
+from simulation import Simulation
+from utils import GRID_SIZE, REPLAY_FILE
+
+# Replay file layout:
+#   header  magic, format version, seed, speed, special food chance and duration,
+#           board size (version 2 and later)
+#   events  one opcode byte each, optionally followed by varints
+#   footer  OP_END, final score and the tick the game ended on
+REPLAY_MAGIC = b'SNRP'
+REPLAY_VERSION = 2
+HEADER = struct.Struct('<4sBQHHHH')
+HEADER_V1 = struct.Struct('<4sBQHHH')
+
+# Turn opcodes use the same direction order as the batch engine
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+OP_PLAY_TICKS = 0x10  # varint count: ticks that moved the snake
+OP_IDLE_TICKS = 0x11  # varint count: ticks that only advanced the food timers (paused)
+OP_END = 0xFF
+
+
+class ReplayError(Exception):
+    pass
+
+
+def write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("Truncated replay")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Replay:
+    """Seed, settings and inputs of one game, plus its recorded outcome"""
+
+    def __init__(self, seed, settings, events, score=None, death_tick=None, grid_size=GRID_SIZE):
+        self.seed = seed
+        self.settings = settings
+        self.grid_size = grid_size
+        # List of ('turn', direction), ('play', count) and ('idle', count)
+        self.events = events
+        self.score = score
+        self.death_tick = death_tick
+
+    def to_bytes(self):
+        data = bytearray(HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, self.seed,
+            self.settings['speed'],
+            self.settings['special_food_chance'],
+            self.settings['special_food_duration'],
+            self.grid_size
+        ))
+        for kind, value in self.events:
+            if kind == 'turn':
+                data.append(DIRECTIONS.index(value))
+            else:
+                data.append(OP_PLAY_TICKS if kind == 'play' else OP_IDLE_TICKS)
+                write_varint(data, value)
+        if self.score is not None:
+            data.append(OP_END)
+            write_varint(data, self.score)
+            write_varint(data, self.death_tick)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER_V1.size or data[:4] != REPLAY_MAGIC:
+            raise ReplayError("Not a replay file")
+        version = data[4]
+        if version == 1:
+            header = HEADER_V1
+            _, _, seed, speed, chance, duration = header.unpack_from(data)
+            grid_size = GRID_SIZE
+        elif version == REPLAY_VERSION:
+            header = HEADER
+            if len(data) < header.size:
+                raise ReplayError("Truncated replay header")
+            _, _, seed, speed, chance, duration, grid_size = header.unpack_from(data)
+        else:
+            raise ReplayError(f"Unsupported replay version {version}")
+        settings = {'speed': speed, 'special_food_chance': chance, 'special_food_duration': duration}
+
+        events = []
+        score = death_tick = None
+        offset = header.size
+        while offset < len(data):
+            op = data[offset]
+            offset += 1
+            if op < len(DIRECTIONS):
+                events.append(('turn', DIRECTIONS[op]))
+            elif op in (OP_PLAY_TICKS, OP_IDLE_TICKS):
+                count, offset = read_varint(data, offset)
+                events.append(('play' if op == OP_PLAY_TICKS else 'idle', count))
+            elif op == OP_END:
+                score, offset = read_varint(data, offset)
+                death_tick, offset = read_varint(data, offset)
+                break
+            else:
+                raise ReplayError(f"Unknown replay opcode {op:#x}")
+        return cls(seed, settings, events, score, death_tick, grid_size)
+
+    def save(self, path):
+        write_file(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def write_file(path, data):
+    """Write through a temporary file and os.replace, so a crash never leaves half a replay"""
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class ReplayWriter:
+    """Saves finished games' replays on a background thread.
+
+    The game thread only encodes the replay, which takes microseconds; the
+    write, sync and rename happen on the writer. Replays are written in the
+    order they were queued, and a failed write is reported without stopping
+    the writer.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.writer = None
+
+    def save(self, replay, path=REPLAY_FILE):
+        self.queue.put((path, replay.to_bytes()))
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_loop, name='replay-writer', daemon=True)
+            self.writer.start()
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, data = item
+            try:
+                write_file(path, data)
+            except OSError as e:
+                print(f"Could not save replay {path}: {e}")
+
+    def close(self):
+        """Wait for queued replays to be written; call once before exiting"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+
+
+class ReplayRecorder:
+    """Collects the inputs of a running game; runs of ticks are stored as counts"""
+
+    def __init__(self, sim, events=()):
+        self.seed = sim.seed
+        self.settings = dict(sim.settings)
+        self.grid_size = sim.grid_size
+        # Events of an earlier part of the game, when continuing an autosave
+        self.events = list(events)
+
+    def record_turn(self, direction):
+        self.events.append(('turn', direction))
+
+    def record_tick(self, playing):
+        kind = 'play' if playing else 'idle'
+        if self.events and self.events[-1][0] == kind:
+            self.events[-1] = (kind, self.events[-1][1] + 1)
+        else:
+            self.events.append((kind, 1))
+
+    def finish(self, score, death_tick):
+        return Replay(self.seed, self.settings, list(self.events), score, death_tick, self.grid_size)
+
+
+class ReplayPlayback:
+    """Feeds a replay back one tick at a time"""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.index = 0
+        self.remaining = 0
+        self.playing = False
+
+    def next_tick(self):
+        """Return (turns to queue, whether the snake moves) or None when the replay ends"""
+        turns = []
+        while self.remaining == 0:
+            if self.index >= len(self.replay.events):
+                return None
+            kind, value = self.replay.events[self.index]
+            self.index += 1
+            if kind == 'turn':
+                turns.append(value)
+            else:
+                self.remaining = value
+                self.playing = kind == 'play'
+        self.remaining -= 1
+        return turns, self.playing
+
+
+def apply_tick(sim, turns, playing):
+    """Run one recorded tick on a simulation"""
+    for direction in turns:
+        sim.snake.queue_direction(direction)
+    sim.update_food()
+    if playing and sim.alive:
+        sim.step()
+
+
+def simulate(replay):
+    """Re-run a replay headless as fast as possible; returns the final Simulation"""
+    sim = Simulation(replay.settings, replay.seed, replay.grid_size)
+    playback = ReplayPlayback(replay)
+    while sim.alive:
+        tick = playback.next_tick()
+        if tick is None:
+            break
+        apply_tick(sim, *tick)
+    return sim
+
+
+def verify(replay):
+    """Check that a replay reproduces its recorded score and death tick"""
+    sim = simulate(replay)
+    return sim.score == replay.score and (sim.ticks if not sim.alive else None) == replay.death_tick
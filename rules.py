@@ -0,0 +1,10 @@
+# Game rule constants, kept free of pygame so the headless batch engine and
+# sweep workers can import them without loading it
+
+GRID_SIZE = 30
+FPS = 10
+
+# Special food constants
+SPECIAL_FOOD_DURATION = 300  # 30 seconds at 10 FPS
+SPECIAL_FOOD_SPAWN_CHANCE = 0.1  # 10% chance every 5 points
+SPECIAL_FOOD_GROWTH_BONUS = 3  # Extra segments when eaten
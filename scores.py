@@ -0,0 +1,135 @@
+import bisect
+import json
+import os
+import queue
+import threading
+import time
+from utils import HIGH_SCORE_FILE, SCORE_LOG_FILE, SCORE_SNAPSHOT_FILE, LEADERBOARD_SIZE, load_high_score
+
+# Log entries written before the snapshot is rewritten and the log emptied
+COMPACT_INTERVAL = 50
+
+
+class ScoreStore:
+    """Every finished game's score, kept in memory and persisted off the game thread.
+
+    Scores are loaded once. The in-memory list is kept sorted, best first,
+    so the leaderboard and high score need no I/O. New entries go to a
+    background writer that appends them to a JSON Lines log. Every
+    COMPACT_INTERVAL entries it writes the whole list to a snapshot through
+    a temporary file and os.replace, then empties the log, so a crash at any
+    point leaves either the old or the new snapshot plus a readable log.
+    Entries carry increasing ids; log entries already in the snapshot are
+    skipped on load.
+    """
+
+    def __init__(self, log_path=SCORE_LOG_FILE, snapshot_path=SCORE_SNAPSHOT_FILE,
+                 compact_interval=COMPACT_INTERVAL):
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.compact_interval = compact_interval
+        self.entries = []  # Best first
+        self.keys = []     # (-score, timestamp) of each entry, for bisect
+        self.last_id = 0
+        self.queue = queue.Queue()
+        self.writer = None
+        self.lock = threading.Lock()  # Held by the writer while it reads the entries
+        self.load()
+
+    def load(self):
+        entries = []
+        snapshot_id = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            snapshot_id = snapshot['last_id']
+            entries = snapshot['entries']
+        elif os.path.exists(HIGH_SCORE_FILE):
+            # Carry the score of the old single-number file over
+            score = load_high_score()
+            if score:
+                entries = [{'id': 0, 'score': score, 'ticks': None, 'settings': None, 'timestamp': 0.0}]
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line from a crash mid-append
+                    if entry['id'] > snapshot_id:
+                        entries.append(entry)
+
+        for entry in entries:
+            self.insert(entry)
+            self.last_id = max(self.last_id, entry['id'])
+
+    def insert(self, entry):
+        key = (-entry['score'], entry['timestamp'])
+        index = bisect.bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.entries.insert(index, entry)
+        return index
+
+    def add(self, score, settings=None, ticks=None):
+        """Record a finished game; returns its rank, starting at 1"""
+        with self.lock:
+            self.last_id += 1
+            entry = {
+                'id': self.last_id,
+                'score': score,
+                'ticks': ticks,
+                'settings': dict(settings) if settings else None,
+                'timestamp': time.time(),
+            }
+            rank = self.insert(entry) + 1
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_loop, name='score-writer', daemon=True)
+            self.writer.start()
+        self.queue.put(entry)
+        return rank
+
+    def high_score(self):
+        return self.entries[0]['score'] if self.entries else 0
+
+    def top(self, n=LEADERBOARD_SIZE):
+        return self.entries[:n]
+
+    def write_loop(self):
+        pending = 0
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                self.queue.task_done()
+                return
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            pending += 1
+            if pending >= self.compact_interval:
+                self.compact()
+                pending = 0
+            self.queue.task_done()
+
+    def compact(self):
+        """Write all entries to the snapshot atomically and empty the log"""
+        with self.lock:
+            data = {'last_id': self.last_id, 'entries': list(self.entries)}
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # Every logged entry is in the snapshot now; entries still queued are
+        # appended to the emptied log and skipped on load if already included
+        with open(self.log_path, 'w'):
+            pass
+
+    def close(self):
+        """Wait for pending writes; call once before exiting"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
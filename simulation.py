@@ -0,0 +1,171 @@
+import random
+from snake import Snake
+from food import Food
+from state import GameState
+from telemetry import NullTelemetry, DEBUG
+from utils import GRID_SIZE
+
+class Simulation:
+    """Rules of a single game, independent of the window, menus and clock.
+
+    All randomness comes from one random.Random seeded with `seed`, so the
+    same seed, settings and inputs always produce the same game. Game events
+    go to `telemetry` (see telemetry.py), which never touches the generator.
+    """
+
+    __slots__ = ('seed', 'rng', 'settings', 'grid_size', 'snake', 'food', 'score', 'ticks', 'alive',
+                 'base_speed', 'speed', 'special_food_chance', 'special_food_duration',
+                 'telemetry')
+
+    def __init__(self, settings, seed=None, grid_size=GRID_SIZE, telemetry=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.settings = dict(settings)
+        self.grid_size = grid_size
+        
+        self.snake = Snake(grid_size)
+        self.food = Food(self.rng, grid_size)
+        self.score = 0
+        self.ticks = 0  # Number of moves made
+        self.alive = True
+        
+        # Settings from Menu.get_settings
+        self.base_speed = settings['speed']
+        self.speed = self.base_speed
+        self.special_food_chance = settings['special_food_chance'] / 100.0  # Convert to decimal
+        self.special_food_duration = settings['special_food_duration'] * 10  # Convert to frames
+        self.telemetry = telemetry or NullTelemetry()
+
+    def snapshot(self):
+        """GameState holding everything needed to continue this game later"""
+        state = GameState()
+        state.seed = self.seed
+        state.settings = dict(self.settings)
+        state.grid_size = self.grid_size
+        state.ticks = self.ticks
+        state.score = self.score
+        state.speed = self.speed
+        state.alive = self.alive
+        state.direction = self.snake.direction
+        state.grow_pending = self.snake.grow_pending
+        state.turns = [turn for turn, _ in self.snake.input_queue]
+        state.body = self.snake.cells()
+        state.free_cells = self.snake.free_cells.copy()
+        food = self.food
+        state.food = 0 if food.position is None else self.snake.cell_index(food.position) + 1
+        state.food_special = food.is_special
+        state.special_timer = food.special_timer
+        state.special_duration = food.special_duration
+        state.animation_timer = food.animation_timer
+        state.rng_state = self.rng.getstate()
+        return state
+
+    def restore(self, state):
+        """Continue from a snapshot; the snake and food are replaced by new objects"""
+        self.seed = state.seed
+        self.settings = dict(state.settings)
+        self.grid_size = state.grid_size
+        self.base_speed = self.settings['speed']
+        self.special_food_chance = self.settings['special_food_chance'] / 100.0
+        self.special_food_duration = self.settings['special_food_duration'] * 10
+        self.ticks = state.ticks
+        self.score = state.score
+        self.speed = state.speed
+        self.alive = state.alive
+        
+        self.snake = Snake(self.grid_size)
+        self.snake.restore(state.body, state.direction, state.grow_pending, state.turns,
+                           state.free_cells.copy())
+        self.rng = random.Random()
+        self.food = Food(self.rng, self.grid_size)
+        food = self.food
+        cell = state.food - 1
+        food.position = (cell % self.grid_size, cell // self.grid_size) if state.food else None
+        food.is_special = state.food_special
+        food.special_timer = state.special_timer
+        food.special_duration = state.special_duration
+        food.animation_timer = state.animation_timer
+        # Last, since creating the food draws from the generator
+        self.rng.setstate(state.rng_state)
+
+    @classmethod
+    def from_state(cls, state, telemetry=None):
+        sim = cls.__new__(cls)
+        sim.telemetry = telemetry or NullTelemetry()
+        sim.restore(state)
+        return sim
+
+    def clone(self):
+        """Independent copy for trying moves ahead; the original is unaffected"""
+        other = Simulation.__new__(Simulation)
+        for name in Simulation.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.rng = random.Random()
+        other.rng.setstate(self.rng.getstate())
+        other.snake = self.snake.clone()
+        other.food = self.food.clone(other.rng)
+        other.telemetry = NullTelemetry()  # Moves tried ahead are not game events
+        return other
+
+    def update_food(self):
+        """Advance food animation and the special food timer by one tick"""
+        self.food.update()
+
+    def step(self):
+        """Move the snake and apply collisions and food; returns False when the game ends"""
+        self.snake.move()
+        self.ticks += 1
+        
+        # Check for self-collision
+        if self.snake.collides_with_self():
+            self.alive = False
+            self.record_death('self_collision')
+            return False
+        
+        # Check for food collision
+        if self.snake.get_head() == self.food.position:
+            if self.food.is_special:
+                # Special food gives bonus points and growth
+                self.snake.grow()
+                self.snake.grow()
+                self.snake.grow()  # 3 extra segments
+                self.score += 5  # 5 points instead of 1
+            else:
+                # Normal food
+                self.snake.grow()
+                self.score += 1
+            self.telemetry.record('food_eaten', DEBUG, tick=self.ticks, score=self.score,
+                                  special=self.food.is_special, length=len(self.snake.body))
+            
+            # Spawn new food; a full board ends the game
+            if not self.food.randomize_position(self.snake.free_cells):
+                self.alive = False
+                self.record_death('board_full')
+                return False
+            
+            # Check if we should spawn special food (only when no special food is active)
+            if not self.food.is_special:
+                # Check every 3 points instead of 5 for more frequent spawning
+                if self.score % 3 == 0:
+                    # Use the configured chance from settings
+                    spawned = self.rng.random() < self.special_food_chance
+                    if spawned:
+                        self.food.spawn_special_food(self.snake.free_cells, self.special_food_duration)
+                    self.telemetry.record('special_check', tick=self.ticks, score=self.score,
+                                          chance=self.special_food_chance, spawned=spawned)
+            
+            # Increase speed every 5 points (but respect settings)
+            if self.score % 5 == 0:
+                max_speed = self.base_speed + 10  # Allow some speed increase
+                speed = min(self.speed + 2, max_speed)
+                if speed != self.speed:
+                    self.speed = speed
+                    self.telemetry.record('speed_change', tick=self.ticks, score=self.score, speed=speed)
+        
+        return True
+
+    def record_death(self, cause):
+        self.telemetry.record('death', tick=self.ticks, score=self.score, cause=cause,
+                              length=len(self.snake.body))
@@ -1,14 +1,103 @@
 import pygame
+from array import array
+from collections import Counter, deque
+from itertools import islice
+from cells import FreeCellIndex
+from sprites import atlas
 from utils import CELL_SIZE, GRID_SIZE, GREEN, YELLOW, BLACK
 
+# Number of vacated tail cells remembered for incremental renderers
+TAIL_LOG_SIZE = 32
+
+# Turns that can be buffered ahead of the snake, applied one per move
+INPUT_QUEUE_SIZE = 3
+
+def bake_segment(color, border):
+    """One snake tile for the sprite atlas"""
+    tile = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+    rect = tile.get_rect()
+    pygame.draw.rect(tile, color, rect)
+    pygame.draw.rect(tile, BLACK, rect, border)
+    return [tile], (0, 0)
+
+
+def segment_tile(is_head):
+    if is_head:
+        return atlas.get('snake_head', lambda: bake_segment(YELLOW, 2))[0]
+    return atlas.get('snake_body', lambda: bake_segment(GREEN, 1))[0]
+
+
 class Snake:
-    def __init__(self):
+    __slots__ = ('grid_size', 'body', 'occupancy', 'free_cells', 'direction', 'grow_pending',
+                 'input_queue', 'applied_input', 'self_collision', 'moves', 'pops', 'vacated',
+                 'previous_head', 'previous_tail')
+
+    def __init__(self, grid_size=GRID_SIZE):
+        self.grid_size = grid_size
         self.reset()
 
     def reset(self):
-        self.body = [(GRID_SIZE // 2, GRID_SIZE // 2)]
-        self.direction = (0, -1)  # Start moving up
-        self.grow_pending = 0
+        start = (self.grid_size // 2, self.grid_size // 2)
+        self.restore([self.cell_index(start)], (0, -1))  # Start moving up
+
+    def restore(self, cells, direction, grow_pending=0, turns=(), free_cells=None):
+        """Replace the whole state with a body given as cell indices, head first.
+
+        free_cells, if given, must be the index saved with the body; food
+        placement depends on its layout, not only on which cells are free.
+        """
+        size = self.grid_size
+        self.body = deque((cell % size, cell // size) for cell in cells)
+        # Number of body segments on each cell, indexed by y * grid_size + x
+        self.occupancy = bytearray(size * size)
+        # Cells not covered by the snake, kept in sync for food placement
+        self.free_cells = free_cells if free_cells is not None else FreeCellIndex(size * size)
+        for cell in cells:
+            self.occupancy[cell] = min(self.occupancy[cell] + 1, 255)
+            self.free_cells.occupy(cell)
+        self.direction = direction
+        self.grow_pending = grow_pending
+        
+        # Buffered turns as (direction, timestamp) pairs
+        self.input_queue = deque((turn, None) for turn in turns)
+        self.applied_input = None  # Timestamp of the turn used by the last move
+        self.self_collision = False
+        
+        # Change log: renderers compare these counters with what they last drew
+        self.moves = 0
+        self.pops = 0
+        self.vacated = deque(maxlen=TAIL_LOG_SIZE)
+        
+        # Where the head and tail were before the last move, for interpolation
+        self.previous_head = self.body[0]
+        self.previous_tail = None
+
+    def cells(self):
+        """Body as a packed array of cell indices, head first"""
+        size = self.grid_size
+        return array('I', [y * size + x for x, y in self.body])
+
+    def clone(self):
+        """Independent copy for lookahead; the original is left untouched.
+
+        The copy counts its segments in a Counter instead of a board-sized
+        occupancy array, and the free cell index holds entries in proportion
+        to the snake, so cloning and moving the copy cost time per segment,
+        not per board cell.
+        """
+        other = Snake.__new__(Snake)
+        for name in Snake.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.body = self.body.copy()
+        size = self.grid_size
+        other.occupancy = Counter(y * size + x for x, y in self.body)
+        other.free_cells = self.free_cells.copy()
+        other.input_queue = self.input_queue.copy()
+        other.vacated = self.vacated.copy()
+        return other
+
+    def cell_index(self, position):
+        return position[1] * self.grid_size + position[0]
 
     def set_direction(self, dir):
         # Prevent reversing
@@ -16,26 +105,66 @@ class Snake:
             return
         self.direction = dir
 
+    def queue_direction(self, dir, timestamp=None):
+        """Buffer a turn for an upcoming move.
+
+        The turn is checked against the last queued direction rather than the
+        current one, so quick double turns are not lost. Returns False when the
+        turn is rejected or the queue is full.
+        """
+        last = self.input_queue[-1][0] if self.input_queue else self.direction
+        if dir == last or (dir[0] == -last[0] and dir[1] == -last[1]):
+            return False
+        if len(self.input_queue) >= INPUT_QUEUE_SIZE:
+            return False
+        self.input_queue.append((dir, timestamp))
+        return True
+
     def move(self):
+        self.applied_input = None
+        if self.input_queue:
+            dir, self.applied_input = self.input_queue.popleft()
+            self.set_direction(dir)
+        
         head_x, head_y = self.body[0]
         dx, dy = self.direction
         
         # Calculate new head position with wall wrapping
-        new_head_x = (head_x + dx) % GRID_SIZE
-        new_head_y = (head_y + dy) % GRID_SIZE
+        new_head_x = (head_x + dx) % self.grid_size
+        new_head_y = (head_y + dy) % self.grid_size
         new_head = (new_head_x, new_head_y)
+        self.previous_head = self.body[0]
+        self.previous_tail = None
         
-        self.body.insert(0, new_head)
         if self.grow_pending > 0:
             self.grow_pending -= 1
         else:
-            self.body.pop()
+            tail = self.body.pop()
+            tail_index = self.cell_index(tail)
+            self.occupancy[tail_index] -= 1
+            if self.occupancy[tail_index] == 0:
+                self.free_cells.release(tail_index)
+            self.vacated.append(tail)
+            self.pops += 1
+            self.previous_tail = tail
+        
+        # The head collides if any remaining segment already sits on its cell
+        index = self.cell_index(new_head)
+        self.self_collision = self.occupancy[index] > 0
+        self.occupancy[index] = min(self.occupancy[index] + 1, 255)
+        self.free_cells.occupy(index)
+        self.body.appendleft(new_head)
+        self.moves += 1
 
     def grow(self):
         self.grow_pending += 1
 
     def collides_with_self(self):
-        return self.body[0] in self.body[1:]
+        return self.self_collision
+
+    def occupies(self, position):
+        """Check whether any body segment is on the given cell"""
+        return self.occupancy[self.cell_index(position)] > 0
 
     def collides_with_wall(self):
         # No longer needed since we implement wall wrapping
@@ -44,13 +173,71 @@ class Snake:
     def get_head(self):
         return self.body[0]
 
-    def render(self, surface):
-        for i, (x, y) in enumerate(self.body):
-            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            
-            if i == 0:  # Head
-                pygame.draw.rect(surface, YELLOW, rect)
-                pygame.draw.rect(surface, BLACK, rect, 2)
-            else:  # Body
-                pygame.draw.rect(surface, GREEN, rect)
-                pygame.draw.rect(surface, BLACK, rect, 1) 
\ No newline at end of file
+    def body_segments_at(self, position):
+        """Number of segments behind the head on the given cell"""
+        return self.occupancy[self.cell_index(position)] - (position == self.body[0])
+
+    def render(self, surface, alpha=1.0, camera=None):
+        """Draw the snake, culled to the camera viewport if one is given.
+
+        With alpha < 1 the head and tail are drawn partway through the last move.
+        """
+        if not (alpha < 1.0 and self.moves > 0):
+            self.render_between(surface, self.body[0], self.body[0], 1.0, camera, True)
+
+        for position in self.visible_body(camera):
+            self.render_segment(surface, position)
+
+        self.render_head(surface, alpha, camera)
+
+    def render_head(self, surface, alpha=1.0, camera=None):
+        """Draw the moving parts over an already drawn body.
+
+        With interpolation that is the head and the sliding tail; otherwise the
+        head stays under any body segment it ran into.
+        """
+        if alpha < 1.0 and self.moves > 0:
+            if self.previous_tail is not None:
+                self.render_between(surface, self.previous_tail, self.body[-1], alpha, camera)
+            self.render_between(surface, self.previous_head, self.body[0], alpha, camera, True)
+        elif self.body_segments_at(self.body[0]) == 0:
+            self.render_between(surface, self.body[0], self.body[0], 1.0, camera, True)
+
+    def visible_body(self, camera=None):
+        """Screen cells of all body segments behind the head that are in view"""
+        if camera is None:
+            yield from islice(self.body, 1, None)
+            return
+
+        if len(self.body) <= camera.view * camera.view:
+            for position in islice(self.body, 1, None):
+                screen_position = camera.to_screen(position)
+                if screen_position is not None:
+                    yield screen_position
+            return
+
+        # Long snakes: scan the viewport instead, so the cost depends on the window size
+        for y in range(camera.view):
+            for x in range(camera.view):
+                if self.body_segments_at(camera.to_board((x, y))) > 0:
+                    yield (x, y)
+
+    def render_between(self, surface, start, end, alpha, camera=None, is_head=False):
+        """Draw a segment alpha of the way from start to the adjacent cell end"""
+        if camera is not None:
+            screen_start = camera.to_screen(start)
+            if screen_start is None:
+                return
+        else:
+            screen_start = start
+        
+        # Step towards end, across wrapped edges
+        dx = (end[0] - start[0] + 1) % self.grid_size - 1
+        dy = (end[1] - start[1] + 1) % self.grid_size - 1
+        position = (screen_start[0] + dx * alpha, screen_start[1] + dy * alpha)
+        self.render_segment(surface, position, is_head)
+
+    def render_segment(self, surface, position, is_head=False):
+        """Draw one segment at a (possibly fractional) screen cell"""
+        x, y = position
+        atlas.blit(surface, segment_tile(is_head), (round(x * CELL_SIZE), round(y * CELL_SIZE)))
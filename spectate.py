@@ -0,0 +1,252 @@
+"""Watch a game streamed by `python main.py --stream`.
+
+    python spectate.py                  # localhost, default port
+    python spectate.py --port 7879      # a game started with --stream 7879
+    python spectate.py --headless       # print the score as it changes
+    python spectate.py --check          # stream a seeded game over localhost and verify it
+
+The viewer keeps only the state rebuilt from the stream and draws it with
+the game's sprites; it runs no simulation of its own.
+"""
+import argparse
+import random
+import socket
+import sys
+import pygame
+from camera import Camera
+from display import Display
+from food import food_frames, SPECIAL_FOOD_WARNING
+from menu import SLIDERS
+from simulation import Simulation
+from snake import segment_tile
+from sprites import atlas
+from stream import (SpectatorServer, SpectatorState, StateEncoder, StreamDecoder,
+                    STREAM_HOST, STREAM_PORT)
+from utils import *
+
+# Round-trip check: ticks streamed, board size (small, so games end often),
+# keyframe spacing, and seconds to wait for a viewer
+CHECK_TICKS = 3000
+CHECK_GRID_SIZE = 8
+CHECK_KEYFRAME_INTERVAL = 25
+CHECK_TIMEOUT = 5.0
+
+
+class Viewer:
+    """Reads the stream without blocking and draws the latest state"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.decoder = StreamDecoder()
+        self.state = SpectatorState()
+        self.camera = None
+        self.connected = True
+
+    def poll(self):
+        """Apply everything received since the last call; returns True if the state changed"""
+        changed = False
+        while self.connected:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return changed
+            if not data:
+                self.connected = False
+                return changed
+            for message in self.decoder.feed(data):
+                self.state.apply(message)
+                changed = True
+        return changed
+
+    def render(self, surface, font, background):
+        state = self.state
+        surface.blit(background, (0, 0))
+        if state.body is not None:
+            if self.camera is None or self.camera.grid_size != state.grid_size:
+                self.camera = Camera(state.grid_size)
+            camera = self.camera
+            camera.follow(state.position(state.body[0]))
+
+            if state.food is not None:
+                screen_position = camera.to_screen(state.position(state.food))
+                if screen_position is not None:
+                    if not state.special_timer:
+                        variant = 'normal'
+                    else:
+                        variant = 'special' if state.special_timer > SPECIAL_FOOD_WARNING else 'expiring'
+                    frame = food_frames(variant)[state.ticks % FOOD_ANIMATION_DURATION]
+                    atlas.blit(surface, frame, (screen_position[0] * CELL_SIZE, screen_position[1] * CELL_SIZE))
+
+            # Body from the tail up, so the head ends on top
+            for i in range(len(state.body) - 1, -1, -1):
+                screen_position = camera.to_screen(state.position(state.body[i]))
+                if screen_position is not None:
+                    atlas.blit(surface, segment_tile(i == 0),
+                               (screen_position[0] * CELL_SIZE, screen_position[1] * CELL_SIZE))
+
+        pygame.draw.rect(surface, BLUE, (0, WINDOW_SIZE, WINDOW_SIZE, 40))
+        if not self.connected:
+            status = "Disconnected"
+        elif state.body is None:
+            status = "Waiting for the game..."
+        else:
+            status = f"Score: {state.score}"
+            if state.special_timer:
+                status += f"   Special Food: {state.special_timer // 10}s"
+            if state.game_over:
+                status += "   GAME OVER"
+        surface.blit(render_text(font, status, WHITE), (10, WINDOW_SIZE + 10))
+
+
+def watch_headless(viewer):
+    """Print the score whenever it changes, until the stream ends"""
+    viewer.sock.setblocking(True)
+    score = None
+    while True:
+        data = viewer.sock.recv(65536)
+        if not data:
+            break
+        for message in viewer.decoder.feed(data):
+            viewer.state.apply(message)
+        if viewer.state.body is None:
+            continue  # Nothing to show before the first keyframe
+        if viewer.state.score != score:
+            score = viewer.state.score
+            print(f"tick {viewer.state.ticks}: score {score}, length {len(viewer.state.body)}")
+
+
+def state_differences(state, sim, game_over):
+    """Names of the fields where a decoded state differs from the live game"""
+    snake = sim.snake
+    food = sim.food.position
+    expected = {
+        'body': [snake.cell_index(position) for position in snake.body],
+        'ticks': sim.ticks,
+        'score': sim.score,
+        'food': None if food is None else snake.cell_index(food),
+        'special_timer': StateEncoder.timer_value(sim),
+        'game_over': game_over,
+    }
+    decoded = dict(vars(state), body=None if state.body is None else list(state.body))
+    return [name for name, value in expected.items() if decoded[name] != value]
+
+
+def wait_for(viewer, sim, game_over):
+    """Read the stream until the viewer shows the live state; returns the fields still differing"""
+    while True:
+        differences = state_differences(viewer.state, sim, game_over)
+        if not differences:
+            return []
+        try:
+            data = viewer.sock.recv(65536)
+        except socket.timeout:
+            return differences
+        if not data:
+            return differences
+        for message in viewer.decoder.feed(data):
+            viewer.state.apply(message)
+
+
+def check_round_trip(ticks=CHECK_TICKS, seed=0):
+    """Stream seeded games over localhost and compare the viewers' state with the live one.
+
+    One viewer watches from the start and another joins halfway, so both
+    the catch-up from a keyframe and the deltas after it are checked, every
+    tick, across new games and game overs.
+    """
+    server = SpectatorServer(port=0, keyframe_interval=CHECK_KEYFRAME_INTERVAL)
+    port = server.start()
+    settings = {name: initial for name, _, _, _, initial, _ in SLIDERS}
+    settings['special_food_chance'] = 25  # Special food often, so timers are streamed too
+    rng = random.Random(seed)
+    directions = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+    viewers = []
+    def connect():
+        viewer = Viewer(socket.create_connection((STREAM_HOST, port)))
+        viewer.sock.settimeout(CHECK_TIMEOUT)
+        viewers.append(viewer)
+
+    connect()
+    sim = Simulation(settings, rng.getrandbits(64), CHECK_GRID_SIZE)
+    games = 1
+    failure = None
+    for tick in range(ticks):
+        if tick == ticks // 2:
+            connect()
+        if rng.random() < 0.3:
+            sim.snake.queue_direction(rng.choice(directions))
+        sim.update_food()
+        game_over = not sim.step()
+        server.publish(sim, game_over)
+        for number, viewer in enumerate(viewers):
+            differences = wait_for(viewer, sim, game_over)
+            if differences:
+                failure = f"viewer {number + 1} differs at streamed tick {tick}: {', '.join(differences)}"
+                break
+        if failure:
+            break
+        if game_over:
+            sim = Simulation(settings, rng.getrandbits(64), CHECK_GRID_SIZE)
+            games += 1
+
+    for viewer in viewers:
+        viewer.sock.close()
+    server.stop()
+    if failure:
+        print(f"Stream MISMATCH: {failure}")
+        return 1
+    print(f"Stream verified: {ticks} ticks over {games} games, {len(viewers)} viewers")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a streamed snake game')
+    parser.add_argument('--host', default=STREAM_HOST)
+    parser.add_argument('--port', type=int, default=STREAM_PORT)
+    parser.add_argument('--headless', action='store_true', help='print score changes instead of drawing')
+    parser.add_argument('--check', action='store_true',
+                        help='stream seeded games to local viewers and verify every tick they decode')
+    args = parser.parse_args()
+    if args.check:
+        return check_round_trip()
+
+    viewer = Viewer(socket.create_connection((args.host, args.port)))
+    if args.headless:
+        watch_headless(viewer)
+        return 0
+
+    pygame.init()
+    display = Display()
+    surface = display.canvas
+    pygame.display.set_caption('Snake Game - Spectator')
+    font = get_font(24)
+    background = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE))
+    background.fill(BLACK)
+    draw_grid(background)
+    clock = pygame.time.Clock()
+
+    dirty = True
+    while True:
+        events = pygame.event.get()
+        if any(event.type == pygame.QUIT for event in events):
+            break
+        if any(event.type == pygame.VIDEORESIZE for event in events):
+            display.layout()
+            dirty = True
+        was_connected = viewer.connected
+        if viewer.poll() or viewer.connected != was_connected:
+            dirty = True
+        if dirty:
+            viewer.render(surface, font, background)
+            display.present()
+            dirty = False
+        clock.tick(RENDER_FPS)
+
+    pygame.quit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import pygame
+
+# Width of the atlas surface; frames are packed left to right in rows
+ATLAS_WIDTH = 1024
+
+
+class Frame:
+    """One pre-rendered image inside the atlas"""
+
+    def __init__(self, area, offset, bounds):
+        self.area = area      # Where the image sits in the atlas surface
+        self.offset = offset  # Where it is drawn relative to the cell's top-left corner
+        self.bounds = bounds  # Visible pixels, relative to the cell's top-left corner
+
+
+class SpriteAtlas:
+    """Animation frames drawn once and packed into a single surface.
+
+    A sprite is a named list of frames, baked on first use by a builder
+    function that returns the frame surfaces and their offset from the cell
+    corner. Drawing a frame is then one blit from the atlas.
+    """
+
+    def __init__(self, width=ATLAS_WIDTH):
+        self.width = width
+        self.surface = pygame.Surface((width, 0), pygame.SRCALPHA)
+        self.sprites = {}
+        self.row_y = 0       # Top of the row being filled
+        self.row_x = 0       # Next free x in that row
+        self.row_height = 0
+
+    def get(self, name, builder):
+        """Frames of a sprite, built with builder() -> (surfaces, offset) the first time"""
+        frames = self.sprites.get(name)
+        if frames is None:
+            surfaces, offset = builder()
+            frames = self.sprites[name] = self.pack(surfaces, offset)
+        return frames
+
+    def pack(self, surfaces, offset):
+        # Place every frame first, then grow the atlas once and copy them in
+        areas = []
+        for image in surfaces:
+            width, height = image.get_size()
+            if self.row_x + width > self.width:
+                self.row_y += self.row_height
+                self.row_x = self.row_height = 0
+            areas.append(pygame.Rect(self.row_x, self.row_y, width, height))
+            self.row_x += width
+            self.row_height = max(self.row_height, height)
+
+        needed = self.row_y + self.row_height
+        if needed > self.surface.get_height():
+            grown = pygame.Surface((self.width, needed), pygame.SRCALPHA)
+            grown.blit(self.surface, (0, 0))
+            self.surface = grown
+            if pygame.display.get_surface() is not None:
+                self.surface = self.surface.convert_alpha()
+
+        frames = []
+        for image, area in zip(surfaces, areas):
+            self.surface.blit(image, area)
+            bounds = image.get_bounding_rect().move(offset)
+            frames.append(Frame(area, offset, bounds))
+        return frames
+
+    def blit(self, surface, frame, position):
+        """Draw a frame for the cell whose top-left corner is at pixel position"""
+        surface.blit(self.surface, (position[0] + frame.offset[0], position[1] + frame.offset[1]), frame.area)
+
+
+# Shared by food and snake drawing
+atlas = SpriteAtlas()
@@ -0,0 +1,215 @@
+import os
+import struct
+import sys
+import threading
+from array import array
+from cells import FreeCellIndex
+from utils import AUTOSAVE_FILE
+
+# Game state layout (little-endian):
+#   header  magic, format version, seed, speed, special food chance and duration,
+#           board size, tick, score, current speed, alive flag, direction,
+#           pending growth, food cell + 1 (0 for none), special flag, special
+#           timer, special duration, food animation timer, queued turns, body
+#           length, free cell count, moved free cell entries
+#   turns   dx, dy signed bytes for each buffered turn
+#   body    u32 cell index per segment, head first
+#   free    u32 slot, cell pairs of the free cell index, which decides food placement
+#   rng     624 u32 Mersenne Twister words, position, gauss flag and value
+STATE_MAGIC = b'SNST'
+STATE_VERSION = 1
+HEADER = struct.Struct('<4sBQHHHIIIHBbbIIBIIHBIII')
+RNG_TAIL = struct.Struct('<IBd')
+RNG_WORDS = 624
+
+# Ticks between autosaves while a game is running (5 seconds at 10 FPS)
+AUTOSAVE_INTERVAL = 50
+
+# Autosave file: u32 length of the game state, the state, then the replay so far
+LENGTH = struct.Struct('<I')
+
+# Marker for a queued removal of the autosave file
+DISCARD = object()
+
+
+class StateError(Exception):
+    pass
+
+
+def unpack_cells(data, offset, count):
+    cells = array('I')
+    cells.frombytes(data[offset:offset + 4 * count])
+    if sys.byteorder != 'little':
+        cells.byteswap()
+    return cells
+
+
+class GameState:
+    """Everything needed to continue a game, with the body as packed cell indices.
+
+    Made by Simulation.snapshot and turned back into a game by
+    Simulation.restore or Simulation.from_state. It holds plain values and a
+    copy of the free cell index, whose layout decides where food appears, so
+    it can be kept in memory for undo or lookahead, or written to bytes.
+    """
+
+    __slots__ = ('seed', 'settings', 'grid_size', 'ticks', 'score', 'speed', 'alive',
+                 'direction', 'grow_pending', 'turns', 'body', 'free_cells', 'food', 'food_special',
+                 'special_timer', 'special_duration', 'animation_timer', 'rng_state')
+
+    def to_bytes(self):
+        dx, dy = self.direction
+        data = bytearray(HEADER.pack(
+            STATE_MAGIC, STATE_VERSION, self.seed,
+            self.settings['speed'],
+            self.settings['special_food_chance'],
+            self.settings['special_food_duration'],
+            self.grid_size, self.ticks, self.score, self.speed, self.alive, dx, dy,
+            self.grow_pending, self.food, self.food_special, self.special_timer,
+            self.special_duration, self.animation_timer, len(self.turns), len(self.body),
+            len(self.free_cells), len(self.free_cells.cells)
+        ))
+        for turn in self.turns:
+            data += struct.pack('<bb', *turn)
+        for cells in (self.body, self.free_cells.moved()):
+            packed = array('I', cells)
+            if sys.byteorder != 'little':
+                packed.byteswap()
+            data += packed.tobytes()
+
+        _, words, gauss = self.rng_state
+        data += struct.pack(f'<{RNG_WORDS}I', *words[:RNG_WORDS])
+        data += RNG_TAIL.pack(words[RNG_WORDS], gauss is not None, gauss or 0.0)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size or data[:4] != STATE_MAGIC:
+            raise StateError("Not a game state")
+        if data[4] != STATE_VERSION:
+            raise StateError(f"Unsupported game state version {data[4]}")
+        (_, _, seed, speed, chance, duration, grid_size, ticks, score, current_speed, alive,
+         dx, dy, grow_pending, food, food_special, special_timer, special_duration,
+         animation_timer, turn_count, length, free_count, moved) = HEADER.unpack_from(data)
+        offset = HEADER.size
+        expected = offset + 2 * turn_count + 4 * (length + 2 * moved + RNG_WORDS) + RNG_TAIL.size
+        if len(data) != expected:
+            raise StateError("Truncated game state")
+
+        state = cls()
+        state.seed = seed
+        state.settings = {'speed': speed, 'special_food_chance': chance, 'special_food_duration': duration}
+        state.grid_size = grid_size
+        state.ticks = ticks
+        state.score = score
+        state.speed = current_speed
+        state.alive = bool(alive)
+        state.direction = (dx, dy)
+        state.grow_pending = grow_pending
+        state.turns = [struct.unpack_from('<bb', data, offset + 2 * i) for i in range(turn_count)]
+        offset += 2 * turn_count
+        state.body = unpack_cells(data, offset, length)
+        offset += 4 * length
+        state.free_cells = FreeCellIndex.from_moved(grid_size * grid_size, free_count,
+                                                    unpack_cells(data, offset, 2 * moved))
+        offset += 8 * moved
+        state.food = food
+        state.food_special = bool(food_special)
+        state.special_timer = special_timer
+        state.special_duration = special_duration
+        state.animation_timer = animation_timer
+
+        words = struct.unpack_from(f'<{RNG_WORDS}I', data, offset)
+        position, has_gauss, gauss = RNG_TAIL.unpack_from(data, offset + 4 * RNG_WORDS)
+        state.rng_state = (3, words + (position,), gauss if has_gauss else None)
+        return state
+
+
+class Autosave:
+    """Keeps the running game on disk so it survives a crash.
+
+    The game thread only takes a snapshot; encoding and writing happen on a
+    background thread. Only the newest request matters, so a snapshot still
+    waiting when a newer one arrives is dropped. Files are written to a
+    temporary path, synced and renamed over the old one, so a crash leaves
+    either the previous or the new autosave.
+    """
+
+    def __init__(self, path=AUTOSAVE_FILE):
+        self.path = path
+        self.pending = None  # (state, replay) to write, or DISCARD
+        self.writing = False
+        self.condition = threading.Condition()
+        self.writer = None
+
+    def save(self, state, replay):
+        """Queue a GameState and the Replay of the game so far for writing"""
+        self.request((state, replay))
+
+    def discard(self):
+        """Queue removal of the autosave, once the game it holds is over"""
+        self.request(DISCARD)
+
+    def request(self, item):
+        with self.condition:
+            self.pending = item
+            self.condition.notify()
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_loop, name='autosave-writer', daemon=True)
+            self.writer.start()
+
+    def write_loop(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                item = self.pending
+                self.pending = None
+                self.writing = True
+            try:
+                if item is DISCARD:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                else:
+                    self.write(*item)
+            except (OSError, struct.error) as e:
+                # The game goes on; the previous autosave, if any, is left as it was
+                print(f"Could not update autosave {self.path}: {e}")
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def write(self, state, replay):
+        data = state.to_bytes()
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(LENGTH.pack(len(data)) + data + replay.to_bytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def load(self):
+        """(GameState, replay bytes) of an interrupted game, or None"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        try:
+            (length,) = LENGTH.unpack_from(data)
+            state = GameState.from_bytes(data[LENGTH.size:LENGTH.size + length])
+        except (struct.error, StateError) as e:
+            print(f"Ignoring unreadable autosave {self.path}: {e}")
+            return None
+        return state, data[LENGTH.size + length:]
+
+    def flush(self):
+        """Wait until everything queued has been written"""
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
@@ -0,0 +1,343 @@
+import asyncio
+import struct
+import threading
+from collections import deque
+from itertools import islice
+from replay import write_varint, read_varint
+
+# Spectator stream layout: every message is a little-endian u32 length and a
+# body whose first byte is the message type.
+#   keyframe  version, tick, board size, score, food cell + 1 (0 for none),
+#             special food timer, game over flag, body length, body cells head first
+#   tick      tick, then ops, each an opcode optionally followed by a varint
+STREAM_VERSION = 1
+LENGTH = struct.Struct('<I')
+MSG_KEYFRAME = 0x01
+MSG_TICK = 0x02
+OP_HEAD = 0x10       # varint cell: new head
+OP_TAIL = 0x11       # varint count: cells dropped from the tail
+OP_FOOD = 0x12       # varint food cell + 1, or 0 when there is no food
+OP_SCORE = 0x13      # varint score
+OP_TIMER = 0x14      # varint special food timer, 0 when the food is normal
+OP_GAME_OVER = 0x15
+
+STREAM_HOST = '127.0.0.1'
+STREAM_PORT = 7878
+
+# Ticks between keyframes; a joining or lagging spectator catches up from the last one
+KEYFRAME_INTERVAL = 100
+
+# Bytes queued for one spectator, beyond the size of the last keyframe, before
+# it is considered too slow and resynced
+CLIENT_BUFFER_LIMIT = 64 * 1024
+
+
+class StreamError(Exception):
+    pass
+
+
+def frame(body):
+    return LENGTH.pack(len(body)) + body
+
+
+class StateEncoder:
+    """Turns a Simulation into keyframes and per-tick deltas.
+
+    Deltas come from the snake's change log (new heads and the number of
+    tail pops) and from comparing food, score and timer with what was last
+    sent, so a tick costs a few bytes regardless of the snake's length.
+    """
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.snake = None
+        self.since_keyframe = 0
+
+    def encode(self, sim, game_over=False):
+        """Message for the current state; returns (bytes, is_keyframe)"""
+        snake = sim.snake
+        new_pops = snake.pops - self.pops if snake is self.snake else 0
+        if (snake is not self.snake or self.since_keyframe >= self.keyframe_interval
+                or new_pops > len(snake.vacated)):
+            return self.keyframe(sim, game_over), True
+
+        body = bytearray([MSG_TICK])
+        write_varint(body, sim.ticks)
+        if new_pops:
+            body.append(OP_TAIL)
+            write_varint(body, new_pops)
+        # Oldest new head first, so the viewer can push them in order
+        new_moves = snake.moves - self.moves
+        for position in reversed(list(islice(snake.body, new_moves))):
+            body.append(OP_HEAD)
+            write_varint(body, snake.cell_index(position))
+        self.encode_changes(body, sim)
+        if game_over:
+            body.append(OP_GAME_OVER)
+        self.remember(sim)
+        self.since_keyframe += 1
+        return frame(bytes(body)), False
+
+    def encode_changes(self, body, sim):
+        food = self.food_value(sim)
+        if food != self.food:
+            body.append(OP_FOOD)
+            write_varint(body, food)
+        if sim.score != self.score:
+            body.append(OP_SCORE)
+            write_varint(body, sim.score)
+        timer = self.timer_value(sim)
+        if timer != self.timer:
+            body.append(OP_TIMER)
+            write_varint(body, timer)
+
+    def keyframe(self, sim, game_over=False):
+        snake = sim.snake
+        body = bytearray([MSG_KEYFRAME])
+        for value in (STREAM_VERSION, sim.ticks, sim.grid_size, sim.score,
+                      self.food_value(sim), self.timer_value(sim), int(game_over), len(snake.body)):
+            write_varint(body, value)
+        for position in snake.body:
+            write_varint(body, snake.cell_index(position))
+        self.remember(sim)
+        self.since_keyframe = 0
+        return frame(bytes(body))
+
+    def remember(self, sim):
+        self.snake = sim.snake
+        self.moves = sim.snake.moves
+        self.pops = sim.snake.pops
+        self.food = self.food_value(sim)
+        self.score = sim.score
+        self.timer = self.timer_value(sim)
+
+    @staticmethod
+    def food_value(sim):
+        position = sim.food.position
+        return 0 if position is None else sim.snake.cell_index(position) + 1
+
+    @staticmethod
+    def timer_value(sim):
+        return sim.food.special_timer if sim.food.is_special else 0
+
+
+class SpectatorState:
+    """Game state rebuilt from a spectator stream"""
+
+    def __init__(self):
+        self.grid_size = 0
+        self.body = None  # Cell indices, head first; None until the first keyframe
+        self.ticks = 0
+        self.score = 0
+        self.food = None
+        self.special_timer = 0
+        self.game_over = False
+
+    def position(self, cell):
+        return (cell % self.grid_size, cell // self.grid_size)
+
+    def apply(self, message):
+        """Update the state from one message body (without its length prefix)"""
+        kind = message[0]
+        if kind == MSG_KEYFRAME:
+            self.apply_keyframe(message)
+        elif kind == MSG_TICK:
+            if self.body is not None:  # Deltas before the first keyframe are useless
+                self.apply_tick(message)
+        else:
+            raise StreamError(f"Unknown message type {kind:#x}")
+
+    def apply_keyframe(self, message):
+        offset = 1
+        values = []
+        for _ in range(8):
+            value, offset = read_varint(message, offset)
+            values.append(value)
+        version, self.ticks, self.grid_size, self.score, food, self.special_timer, game_over, length = values
+        if version != STREAM_VERSION:
+            raise StreamError(f"Unsupported stream version {version}")
+        self.food = food - 1 if food else None
+        self.game_over = bool(game_over)
+        body = []
+        for _ in range(length):
+            cell, offset = read_varint(message, offset)
+            body.append(cell)
+        self.body = deque(body)
+
+    def apply_tick(self, message):
+        self.ticks, offset = read_varint(message, 1)
+        while offset < len(message):
+            op = message[offset]
+            offset += 1
+            if op == OP_GAME_OVER:
+                self.game_over = True
+                continue
+            value, offset = read_varint(message, offset)
+            if op == OP_HEAD:
+                self.body.appendleft(value)
+            elif op == OP_TAIL:
+                for _ in range(value):
+                    self.body.pop()
+            elif op == OP_FOOD:
+                self.food = value - 1 if value else None
+            elif op == OP_SCORE:
+                self.score = value
+            elif op == OP_TIMER:
+                self.special_timer = value
+            else:
+                raise StreamError(f"Unknown stream opcode {op:#x}")
+
+
+class StreamDecoder:
+    """Splits received bytes into message bodies"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add received bytes; returns the complete message bodies"""
+        self.buffer += data
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(self.buffer, offset)
+            end = offset + LENGTH.size + length
+            if end > len(self.buffer):
+                break
+            messages.append(bytes(self.buffer[offset + LENGTH.size:end]))
+            offset = end
+        del self.buffer[:offset]
+        return messages
+
+
+class Spectator:
+    """One connected viewer with its own queue of unsent messages"""
+
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.pending = []
+        self.pending_bytes = 0
+        self.ready = asyncio.Event()
+        self.resyncs = 0
+        self.task = None
+
+    def send(self, message):
+        if self.pending_bytes + len(message) > self.server.buffer_limit():
+            # Too slow: drop what it has not received and start again from the last keyframe
+            self.pending = self.server.catch_up()
+            self.pending_bytes = sum(len(m) for m in self.pending)
+            self.resyncs += 1
+        else:
+            self.pending.append(message)
+            self.pending_bytes += len(message)
+        self.ready.set()
+
+    async def run(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            data = b''.join(self.pending)
+            self.pending = []
+            self.pending_bytes = 0
+            self.writer.write(data)
+            await self.writer.drain()
+
+
+class SpectatorServer:
+    """Broadcasts a running game to any number of TCP spectators.
+
+    The asyncio server runs on its own thread. The game thread only encodes
+    each tick once and hands the bytes over with call_soon_threadsafe; the
+    fan-out to viewers happens on the server thread. New viewers get the
+    last keyframe and the deltas since, and a viewer whose backlog exceeds
+    the keyframe size plus `client_buffer_limit` bytes is resynced the same
+    way instead of slowing anyone down. Keyframes grow with the snake, so on
+    big boards a fixed limit would be exceeded by the catch-up alone.
+    """
+
+    def __init__(self, host=STREAM_HOST, port=STREAM_PORT, client_buffer_limit=CLIENT_BUFFER_LIMIT,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        self.host = host
+        self.port = port
+        self.client_buffer_limit = client_buffer_limit
+        self.encoder = StateEncoder(keyframe_interval)
+        self.keyframe = None
+        self.since_keyframe = []
+        self.spectators = set()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.started = threading.Event()
+
+    def start(self):
+        """Start listening on a background thread; returns the port (useful with port 0)"""
+        self.thread = threading.Thread(target=self.serve, name='spectator-server', daemon=True)
+        self.thread.start()
+        self.started.wait()
+        return self.port
+
+    def serve(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self.handle, self.host, self.port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def publish(self, sim, game_over=False):
+        """Send the state after a tick to every spectator; called from the game thread"""
+        if self.loop is None:
+            return
+        message, keyframe = self.encoder.encode(sim, game_over)
+        self.loop.call_soon_threadsafe(self.broadcast, message, keyframe)
+
+    def broadcast(self, message, keyframe):
+        if keyframe:
+            self.keyframe = message
+            self.since_keyframe = []
+        else:
+            self.since_keyframe.append(message)
+        for spectator in self.spectators:
+            spectator.send(message)
+
+    def buffer_limit(self):
+        """Backlog in bytes a viewer may have before it is resynced"""
+        return self.client_buffer_limit + (len(self.keyframe) if self.keyframe else 0)
+
+    def catch_up(self):
+        """Messages that bring a viewer from nothing to the current state"""
+        if self.keyframe is None:
+            return []
+        return [self.keyframe] + self.since_keyframe
+
+    async def handle(self, reader, writer):
+        spectator = Spectator(self, writer)
+        spectator.task = asyncio.current_task()
+        for message in self.catch_up():
+            spectator.send(message)
+        self.spectators.add(spectator)
+        try:
+            await spectator.run()
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self.spectators.discard(spectator)
+            writer.close()
+
+    def stop(self):
+        if self.loop is None:
+            return
+        async def shutdown():
+            self.server.close()
+            tasks = [spectator.task for spectator in self.spectators]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.loop.stop()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+        self.thread.join()
+        self.loop = None
@@ -0,0 +1,216 @@
+"""Parameter sweep for the special food and speed settings.
+
+Plays many headless games for every combination of settings on a process
+pool and prints a summary table. Run from the repository root:
+
+    python sweep.py --special-chance 5 10 25 --special-duration 15 30 60 --games 4000
+    python sweep.py --growth-bonus 1 3 5 --policy mybots:policy --save sweep.json
+
+Games are split into fixed-size chunks, each seeded from the master seed and
+its position in the sweep, so the results do not depend on the number of
+workers.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from engine import BatchEngine, DIRECTIONS, OPPOSITE
+from rules import FPS, GRID_SIZE, SPECIAL_FOOD_GROWTH_BONUS
+
+# Games simulated by one task; small enough to spread over many cores
+CHUNK_SIZE = 500
+DEFAULT_MAX_TICKS = 5000
+
+
+def random_policy(engine):
+    """Pick a random direction, or keep going, for every game"""
+    return engine.rng.integers(-1, 4, engine.num_games)
+
+
+def greedy_policy(engine):
+    """Turn towards the food along the wrapped board, avoiding cells the snake occupies"""
+    g = engine.grid_size
+    heads = engine.body[np.arange(engine.num_games), engine.head_ptr]
+    x = (heads % g)[:, None] + DIRECTIONS[:, 0]
+    y = (heads // g)[:, None] + DIRECTIONS[:, 1]
+    x %= g
+    y %= g
+
+    # Wrapped Manhattan distance from each neighbour to the food
+    food = np.maximum(engine.food, 0)[:, None]
+    dx = np.abs(x - food % g)
+    dy = np.abs(y - food // g)
+    distance = np.minimum(dx, g - dx) + np.minimum(dy, g - dy)
+
+    blocked = np.take_along_axis(engine.occupied, y * g + x, axis=1)
+    blocked |= np.arange(4) == OPPOSITE[engine.direction][:, None]
+    distance = np.where(blocked, np.iinfo(np.int64).max, distance)
+    actions = np.argmin(distance, axis=1)
+    return np.where(blocked.all(axis=1), -1, actions)
+
+
+POLICIES = {'random': random_policy, 'greedy': greedy_policy}
+
+
+def load_policy(name):
+    """A built-in policy name or 'module:function' for policy(engine) -> actions"""
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, function = name.partition(':')
+    if not function:
+        raise ValueError(f"Unknown policy {name!r}; use one of {sorted(POLICIES)} or module:function")
+    return getattr(importlib.import_module(module), function)
+
+
+def run_chunk(task):
+    """Play one chunk of games for one configuration; returns summed statistics"""
+    config, num_games, seed, policy_name, grid_size, max_ticks = task
+    policy = load_policy(policy_name)
+    engine = BatchEngine(
+        num_games, grid_size=grid_size,
+        speed=config['speed'],
+        special_food_chance=config['special_food_chance'] / 100.0,
+        special_food_duration=config['special_food_duration'] * 10,
+        growth_bonus=config['growth_bonus'],
+        seed=seed,
+    )
+    engine.run(policy, max_ticks)
+    score = engine.score.astype(np.float64)
+    return {
+        'games': num_games,
+        'score': float(score.sum()),
+        'score_sq': float((score * score).sum()),
+        'max_score': int(engine.score.max()),
+        'ticks': int(engine.ticks.sum()),
+        'seconds': float(engine.seconds.sum()),
+        'deaths': int((~engine.alive).sum()),
+        'special_spawned': int(engine.special_spawned.sum()),
+        'special_eaten': int(engine.special_eaten.sum()),
+    }
+
+
+def merge(total, part):
+    for key, value in part.items():
+        if key == 'max_score':
+            total[key] = max(total.get(key, 0), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def summarize(config, total):
+    games = total['games']
+    mean = total['score'] / games
+    return dict(config,
+                games=games,
+                mean_score=mean,
+                std_score=max(total['score_sq'] / games - mean * mean, 0.0) ** 0.5,
+                max_score=total['max_score'],
+                mean_ticks=total['ticks'] / games,
+                mean_seconds=total['seconds'] / games,
+                death_rate=total['deaths'] / games,
+                special_per_game=total['special_spawned'] / games,
+                special_eaten_per_game=total['special_eaten'] / games,
+                # Can exceed 1: eaten special food respawns as special until its timer runs out
+                special_eaten_per_spawn=(total['special_eaten'] / total['special_spawned']
+                                         if total['special_spawned'] else 0.0))
+
+
+def make_tasks(configs, games, seed, policy, grid_size, max_ticks, chunk_size=CHUNK_SIZE):
+    """One task per chunk; each chunk's seed depends only on the master seed and its position"""
+    tasks = []
+    for index, config in enumerate(configs):
+        for chunk, start in enumerate(range(0, games, chunk_size)):
+            chunk_seed = np.random.SeedSequence([seed, index, chunk]).generate_state(2)
+            tasks.append((index, (config, min(chunk_size, games - start),
+                                  int(chunk_seed[0]) << 32 | int(chunk_seed[1]),
+                                  policy, grid_size, max_ticks)))
+    return tasks
+
+
+def sweep(configs, games, seed=0, policy='greedy', grid_size=GRID_SIZE,
+          max_ticks=DEFAULT_MAX_TICKS, workers=None):
+    """Play `games` games per configuration; returns one summary dict per configuration"""
+    load_policy(policy)  # Fail before starting workers
+    tasks = make_tasks(configs, games, seed, policy, grid_size, max_ticks)
+    totals = [{} for _ in configs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(run_chunk, [task for _, task in tasks], chunksize=1)
+        for (index, _), result in zip(tasks, results):
+            merge(totals[index], result)
+    return [summarize(config, total) for config, total in zip(configs, totals)]
+
+
+COLUMNS = [
+    ('speed', 'speed', '{:>5}'),
+    ('special_food_chance', 'chance%', '{:>7}'),
+    ('special_food_duration', 'dur s', '{:>5}'),
+    ('growth_bonus', 'bonus', '{:>5}'),
+    ('mean_score', 'score', '{:>8.2f}'),
+    ('std_score', 'std', '{:>7.2f}'),
+    ('max_score', 'max', '{:>5}'),
+    ('mean_ticks', 'ticks', '{:>8.0f}'),
+    ('mean_seconds', 'secs', '{:>7.1f}'),
+    ('death_rate', 'died', '{:>5.0%}'),
+    ('special_per_game', 'spawn/g', '{:>7.2f}'),
+    ('special_eaten_per_game', 'eaten/g', '{:>7.2f}'),
+    ('special_eaten_per_spawn', 'per spawn', '{:>9.2f}'),
+]
+
+
+def format_table(rows):
+    header = ' '.join(f'{title:>{len(fmt.format(0))}}' for _, title, fmt in COLUMNS)
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        lines.append(' '.join(fmt.format(row[key]) for key, _, fmt in COLUMNS))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep game settings over headless bot games')
+    parser.add_argument('--speed', type=int, nargs='+', default=[FPS],
+                        help='starting game speeds (Game Speed slider, 5-20)')
+    parser.add_argument('--special-chance', type=int, nargs='+', default=[10],
+                        help='special food chance in percent (slider, 5-25)')
+    parser.add_argument('--special-duration', type=int, nargs='+', default=[30],
+                        help='special food duration in seconds (slider, 15-60)')
+    parser.add_argument('--growth-bonus', type=int, nargs='+', default=[SPECIAL_FOOD_GROWTH_BONUS],
+                        help='segments added by special food')
+    parser.add_argument('--games', type=int, default=2000, help='games per configuration')
+    parser.add_argument('--max-ticks', type=int, default=DEFAULT_MAX_TICKS,
+                        help='stop games that are still running after this many ticks')
+    parser.add_argument('--grid-size', type=int, default=GRID_SIZE, metavar='CELLS')
+    parser.add_argument('--policy', default='greedy',
+                        help="bot policy: 'greedy', 'random' or module:function")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='master seed')
+    parser.add_argument('--save', metavar='FILE', help='also write the summary as JSON')
+    args = parser.parse_args()
+
+    configs = [
+        {'speed': speed, 'special_food_chance': chance,
+         'special_food_duration': duration, 'growth_bonus': bonus}
+        for speed, chance, duration, bonus in itertools.product(
+            args.speed, args.special_chance, args.special_duration, args.growth_bonus)
+    ]
+    start = time.perf_counter()
+    rows = sweep(configs, args.games, args.seed, args.policy, args.grid_size,
+                 args.max_ticks, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(format_table(rows))
+    print(f"{len(configs) * args.games} games in {elapsed:.1f} s on {args.workers} workers")
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'seed': args.seed, 'policy': args.policy, 'games': args.games,
+                       'max_ticks': args.max_ticks, 'results': rows}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
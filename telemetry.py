@@ -0,0 +1,212 @@
+"""Structured game events, buffered in memory and written as JSON Lines.
+
+    python telemetry.py                    # statistics per session from telemetry.jsonl
+    python telemetry.py old.jsonl --session 1718000000-4242
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from utils import TELEMETRY_FILE
+
+# Event levels, as in the logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Events kept in memory until the writer picks them up; the oldest are dropped beyond this
+TELEMETRY_BUFFER_SIZE = 4096
+
+# Seconds between background flushes
+TELEMETRY_FLUSH_INTERVAL = 1.0
+
+# The log is moved to FILE.1 once it grows past this many bytes
+TELEMETRY_MAX_BYTES = 5 * 1024 * 1024
+
+
+class Telemetry:
+    """Records game events without doing I/O on the calling thread.
+
+    record() drops events below `level`, keeps a `sample_rates[kind]`
+    fraction of the rest, and appends them to a bounded ring buffer. A
+    background thread writes the buffer out every TELEMETRY_FLUSH_INTERVAL
+    seconds; if it falls behind, the oldest events are dropped and counted
+    rather than stalling the game. Every event carries the session id, the
+    wall time, its kind and level, and its sample rate when below 1.
+    """
+
+    def __init__(self, path=TELEMETRY_FILE, level=INFO, sample_rates=None,
+                 buffer_size=TELEMETRY_BUFFER_SIZE, flush_interval=TELEMETRY_FLUSH_INTERVAL):
+        self.path = path
+        self.level = level
+        self.sample_rates = dict(sample_rates or {})
+        self.flush_interval = flush_interval
+        self.session = f"{int(time.time())}-{os.getpid()}"
+        self.rng = random.Random()  # Never the game's generator, so replays are unaffected
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.condition = threading.Condition()
+        self.writer = None
+        self.closed = False
+
+    def record(self, kind, level=INFO, **fields):
+        if level < self.level:
+            return
+        rate = self.sample_rates.get(kind, 1.0)
+        if rate < 1.0:
+            if self.rng.random() >= rate:
+                return
+            fields['sample'] = rate
+        event = {'session': self.session, 'time': time.time(), 'kind': kind, 'level': LEVEL_NAMES[level]}
+        event.update(fields)
+        with self.condition:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(event)
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_loop, name='telemetry-writer', daemon=True)
+            self.writer.start()
+
+    def write_loop(self):
+        while True:
+            with self.condition:
+                if not self.closed:
+                    self.condition.wait(self.flush_interval)
+                events = list(self.buffer)
+                self.buffer.clear()
+                dropped, self.dropped = self.dropped, 0
+                closed = self.closed
+            if dropped:
+                events.append({'session': self.session, 'time': time.time(), 'kind': 'telemetry_dropped',
+                               'level': LEVEL_NAMES[WARNING], 'count': dropped})
+            if events:
+                self.write(events)
+            if closed:
+                return
+
+    def write(self, events):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > TELEMETRY_MAX_BYTES:
+            os.replace(self.path, self.path + '.1')
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(event) + '\n' for event in events))
+
+    def close(self):
+        """Write everything still buffered; call once before exiting"""
+        if self.writer is None:
+            return
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.writer.join()
+        self.writer = None
+
+
+class NullTelemetry:
+    """Stands in for Telemetry when events are switched off or must not be recorded"""
+
+    def record(self, kind, level=INFO, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+def read_events(path=TELEMETRY_FILE):
+    """Events of a log file, skipping a torn last line"""
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                break
+
+
+def session_stats(events):
+    """Gameplay statistics per session id.
+
+    Sampled events count as 1 / sample rate, so counts estimate the full
+    number of events.
+    """
+    sessions = {}
+    for event in events:
+        stats = sessions.get(event['session'])
+        if stats is None:
+            stats = sessions[event['session']] = {
+                'start': event['time'], 'end': event['time'], 'games': 0, 'scores': [], 'ticks': [],
+                'deaths': {}, 'special_checks': 0.0, 'special_spawns': 0.0, 'food_eaten': 0.0,
+                'top_speed': 0, 'state_seconds': {}, 'state': None, 'state_since': None,
+            }
+        weight = 1.0 / event.get('sample', 1.0)
+        now = event['time']
+        stats['end'] = now
+        kind = event['kind']
+        if kind == 'game_start':
+            stats['games'] += 1
+        elif kind == 'death':
+            stats['scores'].append(event['score'])
+            stats['ticks'].append(event['tick'])
+            stats['deaths'][event['cause']] = stats['deaths'].get(event['cause'], 0) + 1
+        elif kind == 'special_check':
+            stats['special_checks'] += weight
+            stats['special_spawns'] += weight * event['spawned']
+        elif kind == 'food_eaten':
+            stats['food_eaten'] += weight
+        elif kind == 'speed_change':
+            stats['top_speed'] = max(stats['top_speed'], event['speed'])
+        elif kind in ('state', 'quit'):
+            if stats['state'] is not None:
+                seconds = stats['state_seconds']
+                seconds[stats['state']] = seconds.get(stats['state'], 0.0) + now - stats['state_since']
+            stats['state'] = event['state'] if kind == 'state' else None
+            stats['state_since'] = now
+    for stats in sessions.values():
+        stats.pop('state')
+        stats.pop('state_since')
+    return sessions
+
+
+def format_stats(sessions):
+    lines = []
+    for session, stats in sessions.items():
+        scores = stats['scores']
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['start']))
+        lines.append(f"Session {session} ({started}, {(stats['end'] - stats['start']) / 60:.1f} min)")
+        lines.append(f"  games started {stats['games']}, finished {len(scores)}")
+        if scores:
+            lines.append(f"  score mean {sum(scores) / len(scores):.1f}, best {max(scores)}; "
+                         f"mean length {sum(stats['ticks']) / len(scores):.0f} ticks")
+            lines.append("  deaths " + ", ".join(f"{cause} {count}" for cause, count in stats['deaths'].items()))
+        if stats['special_checks']:
+            lines.append(f"  special food checks {stats['special_checks']:.0f}, "
+                         f"spawned {stats['special_spawns'] / stats['special_checks']:.0%}")
+        if stats['food_eaten']:
+            lines.append(f"  food eaten {stats['food_eaten']:.0f}")
+        if stats['top_speed']:
+            lines.append(f"  top speed {stats['top_speed']}")
+        if stats['state_seconds']:
+            lines.append("  time in " + ", ".join(f"{state} {seconds:.0f}s"
+                                                  for state, seconds in stats['state_seconds'].items()))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gameplay statistics from a telemetry log')
+    parser.add_argument('path', nargs='?', default=TELEMETRY_FILE)
+    parser.add_argument('--session', help='only this session id')
+    args = parser.parse_args()
+
+    sessions = session_stats(read_events(args.path))
+    if args.session:
+        sessions = {args.session: sessions[args.session]} if args.session in sessions else {}
+    print(format_stats(sessions) or "No sessions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,14 @@
 import pygame
 import os
+from collections import OrderedDict
+from rules import GRID_SIZE, FPS, SPECIAL_FOOD_DURATION, SPECIAL_FOOD_SPAWN_CHANCE, SPECIAL_FOOD_GROWTH_BONUS
 
 # Game constants
 WINDOW_SIZE = 600
-GRID_SIZE = 30
 CELL_SIZE = WINDOW_SIZE // GRID_SIZE
-FPS = 10
+RENDER_FPS = 60  # Frames drawn per second, independent of the game speed
+MAX_TICKS_PER_FRAME = 5  # Simulation ticks allowed to catch up in one frame
+MENU_IDLE_TIMEOUT = 1000  # Longest wait for input in the main menu, in milliseconds
 
 # Colors
 WHITE = (255, 255, 255)
@@ -22,24 +25,84 @@ PURPLE = (128, 0, 128)  # Special food hover color
 # Animation constants
 FOOD_ANIMATION_DURATION = 30
 
-# Special food constants
-SPECIAL_FOOD_DURATION = 300  # 30 seconds at 10 FPS
-SPECIAL_FOOD_SPAWN_CHANCE = 0.1  # 10% chance every 5 points
-SPECIAL_FOOD_GROWTH_BONUS = 3  # Extra segments when eaten
+# Maximum number of rendered text surfaces kept by the text cache
+TEXT_CACHE_SIZE = 256
 
-# High score file
+# High score file of older versions, imported into the score store once
 HIGH_SCORE_FILE = 'highscore.txt'
 
+# Score store: append-only log plus a compacted snapshot
+SCORE_LOG_FILE = 'scores.log'
+SCORE_SNAPSHOT_FILE = 'scores.json'
+LEADERBOARD_SIZE = 5
+
+# Replay of the most recently finished game
+REPLAY_FILE = 'last_replay.snrp'
+
+# Snapshot of the running game, for recovery after a crash
+AUTOSAVE_FILE = 'autosave.snst'
+
+# Structured game events, see telemetry.py
+TELEMETRY_FILE = 'telemetry.jsonl'
+
 def draw_grid(surface):
     for x in range(0, WINDOW_SIZE, CELL_SIZE):
         pygame.draw.line(surface, DARK_GRAY, (x, 0), (x, WINDOW_SIZE))
     for y in range(0, WINDOW_SIZE, CELL_SIZE):
         pygame.draw.line(surface, DARK_GRAY, (0, y), (WINDOW_SIZE, y))
 
+class TextCache:
+    """Least-recently-used cache of rendered text surfaces"""
+    
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+    
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+
+# Shared by every text draw site in the game and menus
+text_cache = TextCache()
+
+# Fonts by (face, size, bold); SysFont looks the face up every time it is called
+font_registry = {}
+
+def get_font(size, bold=False, face='consolas'):
+    """Shared font object, loaded on first request"""
+    key = (face, size, bold)
+    font = font_registry.get(key)
+    if font is None:
+        font = font_registry[key] = pygame.font.SysFont(face, size, bold=bold)
+    return font
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared cache; the result must not be modified"""
+    return text_cache.render(font, text, tuple(color), antialias)
+
 def ease_in_out(t):
     """Easing function for smooth animations"""
     return t * t * (3.0 - 2.0 * t)
 
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
 def load_high_score():
     if not os.path.exists(HIGH_SCORE_FILE):
         return 0
@@ -48,7 +111,3 @@ def load_high_score():
             return int(f.read())
         except ValueError:
             return 0
-
-def save_high_score(score):
-    with open(HIGH_SCORE_FILE, 'w') as f:
-        f.write(str(score)) 
\ No newline at end of file